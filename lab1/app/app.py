@@ -1,49 +1,45 @@
-import random
-from flask import Flask, render_template
-from faker import Faker
-
-fake = Faker()
+from flask import Flask, render_template, abort
+import posts_data
+from page_cache import page_cache
+from static_assets import init_static
+from metrics import metrics
 
 app = Flask(__name__)
 application = app
 
-images_ids = ['7d4e9175-95ea-4c5f-8be5-92a6b708bb3c',
-              '2d2ab7df-cdbc-48a8-a936-35bba702def5',
-              '6e12f3de-d5fd-4ebb-855b-8cbc485278b7',
-              'afc2cfe7-5cac-4b80-9b9a-d5c65ef0c728',
-              'cab5b7f2-774e-4884-a200-0c0180fa777f']
-
-def generate_comments(replies=True):
-    comments = []
-    for i in range(random.randint(1, 3)):
-        comment = { 'author': fake.name(), 'text': fake.text() }
-        if replies:
-            comment['replies'] = generate_comments(replies=False)
-        comments.append(comment)
-    return comments
-
-def generate_post(i):
-    return {
-        'title': 'Заголовок поста',
-        'text': fake.paragraph(nb_sentences=100),
-        'author': fake.name(),
-        'date': fake.date_time_between(start_date='-2y', end_date='now'),
-        'image_id': f'{images_ids[i]}.jpg',
-        'comments': generate_comments()
-    }
-
-posts_list = sorted([generate_post(i) for i in range(5)], key=lambda p: p['date'], reverse=True)
+init_static(app)
+metrics.init_app(app)
+
+_posts = None
+
+def get_posts():
+    # набор постов читается с диска один раз на процесс, при первом запросе
+    global _posts
+    if _posts is None:
+        _posts = posts_data.load(app.config.get('POSTS_DATA_PATH', posts_data.DATA_PATH))
+    return _posts
+
+def reload_posts():
+    # вызывается при изменении набора постов: сбрасывает данные и отрендеренные страницы
+    global _posts
+    _posts = None
+    page_cache.invalidate()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/posts')
+@page_cache.cached
 def posts():
-    return render_template('posts.html', title='Посты', posts=posts_list)
+    return render_template('posts.html', title='Посты', posts=get_posts())
 
 @app.route('/posts/<int:index>')
+@page_cache.cached
 def post(index):
+    posts_list = get_posts()
+    if index >= len(posts_list):
+        abort(404)
     p = posts_list[index]
     return render_template('post.html', title=p['title'], post=p)
 
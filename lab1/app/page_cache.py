@@ -0,0 +1,54 @@
+import hashlib
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, make_response
+
+class PageCache:
+    # Готовый HTML по ключу (endpoint, аргументы URL). Страницы lab1 не
+    # зависят от пользователя, поэтому повторный запрос — поиск в словаре
+    # вместо рендера Jinja, а при совпадении ETag — пустой ответ 304.
+    def __init__(self):
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def cached(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.endpoint, tuple(sorted(kwargs.items())))
+            entry = self._pages.get(key)
+            if entry is None:
+                response, entry = self._render(view, args, kwargs)
+                if entry is None:
+                    # не кэшируется — отдаём уже готовый ответ, view второй раз не вызываем
+                    return response
+                with self._lock:
+                    self._pages[key] = entry
+            body, etag, last_modified = entry
+            response = make_response(body)
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            return response.make_conditional(request)
+        return wrapper
+
+    def invalidate(self, endpoint=None):
+        with self._lock:
+            if endpoint is None:
+                self._pages.clear()
+            else:
+                for key in [k for k in self._pages if k[0] == endpoint]:
+                    del self._pages[key]
+
+    def _render(self, view, args, kwargs):
+        # возвращает (ответ, запись кэша или None, если ответ кэшировать нельзя)
+        response = make_response(view(*args, **kwargs))
+        # кэшируем только успешные HTML-ответы без собственных cookie
+        if (response.status_code != 200 or response.mimetype != 'text/html'
+                or 'Set-Cookie' in response.headers):
+            return response, None
+        body = response.get_data()
+        etag = hashlib.md5(body).hexdigest()
+        last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        return response, (body, etag, last_modified)
+
+page_cache = PageCache()
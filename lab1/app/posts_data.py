@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import random
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, 'posts.json')
+DEFAULT_COUNT = 5
+DEFAULT_SEED = 241327
+
+images_ids = ['7d4e9175-95ea-4c5f-8be5-92a6b708bb3c',
+              '2d2ab7df-cdbc-48a8-a936-35bba702def5',
+              '6e12f3de-d5fd-4ebb-855b-8cbc485278b7',
+              'afc2cfe7-5cac-4b80-9b9a-d5c65ef0c728',
+              'cab5b7f2-774e-4884-a200-0c0180fa777f']
+
+def generate_comments(fake, replies=True):
+    comments = []
+    for i in range(random.randint(1, 3)):
+        comment = { 'author': fake.name(), 'text': fake.text() }
+        if replies:
+            comment['replies'] = generate_comments(fake, replies=False)
+        comments.append(comment)
+    return comments
+
+def generate_post(fake, i, today):
+    return {
+        'title': 'Заголовок поста',
+        'text': fake.paragraph(nb_sentences=100),
+        'author': fake.name(),
+        'date': fake.date_time_between(start_date=today - timedelta(days=730), end_date=today).isoformat(),
+        'image_id': f'{images_ids[i % len(images_ids)]}.jpg',
+        'comments': generate_comments(fake)
+    }
+
+def generate(path=DATA_PATH, count=DEFAULT_COUNT, seed=DEFAULT_SEED):
+    # Faker нужен только при генерации, воркеры его не импортируют
+    from faker import Faker
+
+    fake = Faker()
+    Faker.seed(seed)
+    random.seed(seed)
+    # отсчёт от начала дня, а не от текущей секунды — иначе один seed
+    # давал бы разные даты в процессах, стартовавших в разное время
+    today = datetime.combine(date.today(), time())
+    posts = sorted([generate_post(fake, i, today) for i in range(count)],
+                   key=lambda p: p['date'], reverse=True)
+
+    # пишем во временный файл и атомарно подменяем: параллельно
+    # стартующие процессы не увидят недописанный JSON
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(posts, f, ensure_ascii=False, separators=(',', ':'))
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+    return posts
+
+def load(path=DATA_PATH):
+    if not os.path.exists(path):
+        generate(path)
+    with open(path, encoding='utf-8') as f:
+        posts = json.load(f)
+    for p in posts:
+        p['date'] = datetime.fromisoformat(p['date'])
+    return posts
+
+def main():
+    parser = argparse.ArgumentParser(description='Генерация набора постов для lab1')
+    parser.add_argument('--count', type=int, default=DEFAULT_COUNT)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--output', default=DATA_PATH)
+    args = parser.parse_args()
+    generate(args.output, args.count, args.seed)
+    print(f'Сгенерировано постов: {args.count} -> {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
 import re
 from flask import Flask, render_template, request, make_response, url_for, redirect
 
+from metrics import metrics
+
 app = Flask(__name__)
+metrics.init_app(app)
 
 
 @app.get("/")
@@ -1,6 +1,7 @@
+import os
 from urllib.parse import urlparse, urljoin
 
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
 from flask_login import (
     LoginManager,
     UserMixin,
@@ -10,8 +11,22 @@ from flask_login import (
     login_required,
 )
 
+from metrics import metrics
+from sessions import session_interface
+from counters import counters
+
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "change-me-ostapenko-241-327"  # нужно для session и Flask-Login
+# сессии хранятся на сервере, в cookie — только подписанный id;
+# "memory" быстрее, но годится лишь для одного процесса
+app.config["SESSION_BACKEND"] = "sqlite"
+app.config["SESSION_SQLITE_PATH"] = os.path.join(os.path.dirname(__file__), "sessions.db")
+metrics.init_app(app)
+# общие счётчики посещений: приращения копятся в памяти и сливаются в БД
+app.config["COUNTER_DB_PATH"] = os.path.join(os.path.dirname(__file__), "counters.db")
+app.config["COUNTER_FLUSH_INTERVAL"] = 1.0
+session_interface.init_app(app)
+counters.init_app(app)
 
 
 # --- Flask-Login setup ---
@@ -60,7 +75,23 @@ def counter():
     # Счётчик посещений через session
     visits = session.get("counter_visits", 0) + 1
     session["counter_visits"] = visits
-    return render_template("counter.html", visits=visits)
+
+    user_id = current_user.id if current_user.is_authenticated else None
+    counters.incr("counter", user_id)
+    return render_template(
+        "counter.html",
+        visits=visits,
+        total_visits=counters.total("counter"),
+        user_visits=counters.total("counter", user_id) if user_id else None,
+    )
+
+
+@app.get("/counter/totals")
+def counter_totals():
+    return jsonify(
+        total=counters.total("counter"),
+        users={user_id: value for user_id, value in counters.top("counter")},
+    )
 
 
 @app.route("/login", methods=["GET", "POST"])
@@ -75,6 +106,7 @@ def login():
 
         user_data = USERS.get(login_value)
         if user_data and user_data["password"] == password_value:
+            session.regenerate()
             login_user(User(login_value), remember=remember)
             flash("Вход выполнен успешно.", "success")
 
@@ -0,0 +1,131 @@
+import atexit
+import os
+import sqlite3
+import threading
+from collections import Counter
+
+# общий итог хранится под пустым user_id: NULL в составном ключе не совпадал бы сам с собой
+GLOBAL = ""
+
+UPSERT_SQL = """
+    INSERT INTO counters(name, user_id, value) VALUES (?, ?, ?)
+    ON CONFLICT(name, user_id) DO UPDATE SET value = value + excluded.value
+"""
+
+
+# Счётчики посещений: запрос лишь увеличивает число в памяти воркера, а
+# фоновый поток раз в flush_interval секунд сливает накопленное в SQLite
+# одним executemany-upsert'ом. Горячий счётчик не упирается в блокировку
+# одной строки на каждый хит, а воркеры не теряют чужие приращения.
+class CounterEngine:
+    def __init__(self, db_path=None, flush_interval=1.0):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.flushes = 0
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.db_path = app.config["COUNTER_DB_PATH"]
+        self.flush_interval = app.config.get("COUNTER_FLUSH_INTERVAL", self.flush_interval)
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS counters (
+              name TEXT NOT NULL,
+              user_id TEXT NOT NULL,
+              value INTEGER NOT NULL DEFAULT 0,
+              PRIMARY KEY (name, user_id)
+            )
+            """
+        )
+        conn.commit()
+        app.extensions["counters"] = self
+        atexit.register(self.stop)
+
+    def _conn(self) -> sqlite3.Connection:
+        # по соединению на поток; после fork соединения родителя не используем
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def incr(self, name: str, user_id: str | None = None, amount: int = 1) -> None:
+        self._ensure_started()
+        with self._lock:
+            self._pending[(name, GLOBAL)] += amount
+            if user_id is not None:
+                self._pending[(name, str(user_id))] += amount
+
+    def total(self, name: str, user_id: str | None = None) -> int:
+        # сохранённое значение + ещё не слитое этим воркером;
+        # приращения других воркеров видны после их ближайшего слива
+        key = (name, GLOBAL if user_id is None else str(user_id))
+        row = self._conn().execute(
+            "SELECT value FROM counters WHERE name = ? AND user_id = ?", key
+        ).fetchone()
+        with self._lock:
+            pending = self._pending.get(key, 0)
+        return (row[0] if row else 0) + pending
+
+    def top(self, name: str, limit: int = 10) -> list:
+        return self._conn().execute(
+            """
+            SELECT user_id, value FROM counters
+            WHERE name = ? AND user_id != ?
+            ORDER BY value DESC
+            LIMIT ?
+            """,
+            (name, GLOBAL, limit),
+        ).fetchall()
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+        conn = self._conn()
+        try:
+            with conn:
+                conn.executemany(UPSERT_SQL, [(name, user_id, n) for (name, user_id), n in pending.items()])
+        except sqlite3.Error:
+            # не потеряем приращения: вернём их в очередь до следующей попытки
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        self.flushes += 1
+        return sum(n for (_, user_id), n in pending.items() if user_id == GLOBAL)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="counter-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass
+
+
+counters = CounterEngine()
@@ -0,0 +1,258 @@
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+
+# сериализатор тот же, что у cookie-сессий Flask (flash-сообщения — кортежи, Markup и т.п.)
+serializer = TaggedJSONSerializer()
+
+
+# --- хранилища: данные сессии по id, с временем истечения ---
+
+class MemoryBackend:
+    # LRU в памяти процесса: быстро, но у каждого воркера свои сессии
+    # и после перезапуска они теряются
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, sid: str) -> str | None:
+        with self._lock:
+            entry = self._items.get(sid)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._items[sid]
+                return None
+            self._items.move_to_end(sid)
+            return entry[1]
+
+    def save(self, sid: str, data: str, expires: float) -> None:
+        with self._lock:
+            self._items[sid] = (expires, data)
+            self._items.move_to_end(sid)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def touch(self, sid: str, expires: float) -> None:
+        with self._lock:
+            entry = self._items.get(sid)
+            if entry is not None:
+                self._items[sid] = (expires, entry[1])
+                self._items.move_to_end(sid)
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._items.pop(sid, None)
+
+
+class SQLiteBackend:
+    # сессии в файле SQLite: общие для всех воркеров и переживают перезапуск
+    PURGE_EVERY = 1000  # раз в столько записей удаляем истёкшие сессии
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+              sid TEXT PRIMARY KEY,
+              data TEXT NOT NULL,
+              expires REAL NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # по соединению на поток, как у пула в lab4/lab5
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, sid: str) -> str | None:
+        row = self._conn().execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expires >= ?", (sid, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def save(self, sid: str, data: str, expires: float) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO sessions(sid, data, expires) VALUES (?, ?, ?)
+                ON CONFLICT(sid) DO UPDATE SET data = excluded.data, expires = excluded.expires
+                """,
+                (sid, data, expires),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+
+    def touch(self, sid: str, expires: float) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("UPDATE sessions SET expires = ? WHERE sid = ?", (expires, sid))
+
+    def delete(self, sid: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+
+# --- сессия и интерфейс Flask ---
+
+class ServerSession(SessionMixin):
+    # Данные читаются из хранилища при первом обращении к session,
+    # запросы, не трогающие сессию, хранилище не используют вовсе.
+    def __init__(self, sid: str | None, loader):
+        self.sid = sid
+        self.old_sid = None
+        self.new = sid is None
+        self.modified = False
+        self.accessed = False
+        self._loader = loader
+        self._data = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    def _load(self) -> dict:
+        self.accessed = True
+        if self._data is None:
+            raw = self._loader(self.sid) if self.sid else None
+            self._data = serializer.loads(raw) if raw else {}
+        return self._data
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self._load()[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def clear(self):
+        self._load().clear()
+        self.modified = True
+
+    def regenerate(self):
+        # новый id при входе: id, выданный до входа (в том числе подброшенный
+        # чужим), не должен стать id авторизованной сессии
+        self._load()
+        if self.sid is not None:
+            self.old_sid = self.sid
+        self.sid = None
+        self.new = True
+        self.modified = True
+
+
+class ServerSessionInterface(SessionInterface):
+    # В cookie лежит только подписанный id сессии: её размер не зависит от
+    # данных, а подпись считается лишь при выдаче нового id (или продлении
+    # permanent-сессии). Хранилище пишется, только если сессия изменилась.
+    salt = "server-session"
+
+    def __init__(self, backend=None):
+        self.backend = backend
+
+    def init_app(self, app):
+        if self.backend is None:
+            kind = app.config.get("SESSION_BACKEND", "memory")
+            if kind == "sqlite":
+                self.backend = SQLiteBackend(app.config["SESSION_SQLITE_PATH"])
+            elif kind == "memory":
+                self.backend = MemoryBackend(app.config.get("SESSION_MEMORY_SIZE", 10000))
+            else:
+                raise ValueError(f"Неизвестное хранилище сессий: {kind}")
+        app.session_interface = self
+        app.extensions["server_session"] = self
+
+    def _signer(self, app) -> Signer:
+        return Signer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        sid = None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+        return ServerSession(sid, self.backend.load)
+
+    def save_session(self, app, session, response):
+        if session.accessed:
+            response.vary.add("Cookie")
+        if not session.loaded:
+            return
+
+        cookie_kwargs = {
+            "domain": self.get_cookie_domain(app),
+            "path": self.get_cookie_path(app),
+            "secure": self.get_cookie_secure(app),
+            "partitioned": self.get_cookie_partitioned(app),
+            "samesite": self.get_cookie_samesite(app),
+            "httponly": self.get_cookie_httponly(app),
+        }
+        name = self.get_cookie_name(app)
+
+        if session.old_sid is not None:
+            self.backend.delete(session.old_sid)
+
+        # сессию очистили — удаляем и запись, и cookie
+        if not session:
+            if session.modified and session.sid:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, **cookie_kwargs)
+            return
+
+        # запись в хранилище живёт не дольше permanent-сессии
+        expires = time.time() + app.permanent_session_lifetime.total_seconds()
+        if session.modified:
+            if session.sid is None:
+                session.sid = secrets.token_urlsafe(32)
+            self.backend.save(session.sid, serializer.dumps(dict(session)), expires)
+
+        if session.sid is None:
+            return
+        if session.new or (session.permanent and app.config["SESSION_REFRESH_EACH_REQUEST"]):
+            # cookie продлевается — продлеваем и запись, иначе активная сессия,
+            # которую только читают, истекла бы в хранилище раньше cookie
+            if not session.modified:
+                self.backend.touch(session.sid, expires)
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode(),
+                expires=self.get_expiration_time(app, session),
+                **cookie_kwargs,
+            )
+
+
+session_interface = ServerSessionInterface()
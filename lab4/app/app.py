@@ -1,9 +1,8 @@
 import os
-import re
 import sqlite3
 from urllib.parse import urlparse, urljoin
 
-from flask import Flask, render_template, request, redirect, url_for, flash, g, abort
+from flask import Flask, render_template, request, redirect, url_for, flash, abort
 from flask_login import (
     LoginManager,
     UserMixin,
@@ -12,13 +11,34 @@ from flask_login import (
     current_user,
     login_required,
 )
-from werkzeug.security import generate_password_hash, check_password_hash
+
+from db import get_db, close_db, request_db_time
+from passwords import hasher, HashingBusy
+from metrics import metrics
+from user_cache import user_cache
+from validators import validate_user, validate_password
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "change-me-ostapenko-241-327"
 
 BASE_DIR = os.path.dirname(__file__)
-DB_PATH = os.path.join(BASE_DIR, "app.db")
+app.config["DB_PATH"] = os.path.join(BASE_DIR, "app.db")
+# пул соединений и PRAGMA (см. db.DEFAULT_PRAGMAS)
+app.config["DB_POOL_SIZE"] = 8
+app.config["DB_PRAGMAS"] = {}
+
+# хэширование паролей: метод/стоимость werkzeug и ограничение параллельности
+app.config["PASSWORD_HASH_METHOD"] = "scrypt:32768:8:1"
+app.config["PASSWORD_HASH_WORKERS"] = 2
+app.config["PASSWORD_HASH_MAX_PENDING"] = 16
+# кэш пользователей для user_loader: срок жизни записи, секунд, и размер
+app.config["USER_CACHE_TTL"] = 30.0
+app.config["USER_CACHE_SIZE"] = 10000
+
+app.teardown_appcontext(close_db)
+metrics.init_app(app, db_time=request_db_time)
+hasher.init_app(app)
+user_cache.init_app(app)
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -28,22 +48,6 @@ login_manager.login_message_category = "warning"
 
 
 # ---------- DB helpers ----------
-def get_db():
-    if "db" not in g:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys=ON")
-        g.db = conn
-    return g.db
-
-
-@app.teardown_appcontext
-def close_db(_exc):
-    db = g.pop("db", None)
-    if db is not None:
-        db.close()
-
-
 def db_one(sql, params=()):
     return get_db().execute(sql, params).fetchone()
 
@@ -67,8 +71,13 @@ class User(UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id: str):
+    # в установившемся режиме данные берутся из кэша, без обращения к users
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return User(*cached)
     row = db_one("SELECT id, login FROM users WHERE id = ?", (user_id,))
     if row:
+        user_cache.put(user_id, (row["id"], row["login"]))
         return User(row["id"], row["login"])
     return None
 
@@ -79,47 +88,16 @@ def is_safe_url(target: str) -> bool:
     return test_url.scheme in ("http", "https") and ref_url.netloc == test_url.netloc
 
 
-# ---------- Validation ----------
-LOGIN_RE = re.compile(r"^[A-Za-z0-9]{5,}$")
-
-PWD_ALLOWED_RE = re.compile(r'^[A-Za-zА-Яа-яЁё0-9~!?@#$%^&*_\-+\(\)\[\]\{\}><\/\\\|"\'\.,:;]+$')
-
-
-def validate_login(login: str) -> str | None:
-    if not login:
-        return "Поле не может быть пустым."
-    if not LOGIN_RE.match(login):
-        return "Логин должен быть не короче 5 символов и содержать только латинские буквы и цифры."
-    return None
-
-
-def validate_required(value: str) -> str | None:
-    if not value:
-        return "Поле не может быть пустым."
-    return None
-
-
-def validate_password(pwd: str) -> list[str]:
-    errors: list[str] = []
-    if not pwd:
-        return ["Поле не может быть пустым."]
+BUSY_MESSAGE = "Сервер перегружен, повторите попытку через несколько секунд."
 
-    if len(pwd) < 8:
-        errors.append("Пароль должен быть не менее 8 символов.")
-    if len(pwd) > 128:
-        errors.append("Пароль должен быть не более 128 символов.")
-    if re.search(r"\s", pwd):
-        errors.append("Пароль не должен содержать пробелы.")
-    if not PWD_ALLOWED_RE.match(pwd):
-        errors.append("Пароль содержит недопустимые символы.")
-    if not re.search(r"[A-ZА-ЯЁ]", pwd):
-        errors.append("Пароль должен содержать хотя бы одну заглавную букву.")
-    if not re.search(r"[a-zа-яё]", pwd):
-        errors.append("Пароль должен содержать хотя бы одну строчную букву.")
-    if not re.search(r"[0-9]", pwd):
-        errors.append("Пароль должен содержать хотя бы одну цифру.")
 
-    return errors
+def rehash_password(user_id: int, password: str) -> None:
+    # параметры хэширования изменились — пересчитываем хэш при успешном входе
+    try:
+        password_hash = hasher.hash(password)
+    except HashingBusy:
+        return  # попробуем при следующем входе
+    db_exec("UPDATE users SET password_hash=? WHERE id=?", (password_hash, user_id))
 
 
 def roles_list():
@@ -195,21 +173,7 @@ def user_create():
             "role_id": request.form.get("role_id", "").strip(),
         }
 
-        e = validate_login(form["login"])
-        if e:
-            errors["login"] = e
-
-        pw_errors = validate_password(form["password"])
-        if pw_errors:
-            errors["password"] = pw_errors[0]
-
-        e = validate_required(form["last_name"])
-        if e:
-            errors["last_name"] = e
-
-        e = validate_required(form["first_name"])
-        if e:
-            errors["first_name"] = e
+        errors = validate_user(form)
 
         if errors:
             flash("Исправьте ошибки в форме.", "danger")
@@ -217,6 +181,12 @@ def user_create():
 
         role_id = int(form["role_id"]) if form["role_id"] else None
 
+        try:
+            password_hash = hasher.hash(form["password"])
+        except HashingBusy:
+            flash(BUSY_MESSAGE, "warning")
+            return render_template("user_create.html", roles=roles, form=form, errors=errors), 503
+
         try:
             db_exec(
                 """
@@ -225,7 +195,7 @@ def user_create():
                 """,
                 (
                     form["login"],
-                    generate_password_hash(form["password"]),
+                    password_hash,
                     form["last_name"],
                     form["first_name"],
                     form["middle_name"] or None,
@@ -270,13 +240,7 @@ def user_edit(user_id: int):
             "role_id": request.form.get("role_id", "").strip(),
         }
 
-        e = validate_required(form["last_name"])
-        if e:
-            errors["last_name"] = e
-
-        e = validate_required(form["first_name"])
-        if e:
-            errors["first_name"] = e
+        errors = validate_user(form, ("last_name", "first_name"))
 
         if errors:
             flash("Исправьте ошибки в форме.", "danger")
@@ -299,6 +263,7 @@ def user_edit(user_id: int):
                     user_id,
                 ),
             )
+            user_cache.invalidate(user_id)
         except Exception:
             flash("Ошибка записи в БД.", "danger")
             return render_template("user_edit.html", roles=roles, form=form, errors=errors, user_id=user_id)
@@ -320,6 +285,7 @@ def user_delete(user_id: int):
 
     try:
         db_exec("DELETE FROM users WHERE id=?", (user_id,))
+        user_cache.invalidate(user_id)
     except Exception:
         flash("Ошибка удаления пользователя.", "danger")
         return redirect(url_for("index"))
@@ -338,7 +304,15 @@ def login():
         password_value = request.form.get("password", "")
 
         row = db_one("SELECT id, login, password_hash FROM users WHERE login = ?", (login_value,))
-        if row and check_password_hash(row["password_hash"], password_value):
+        try:
+            ok = row is not None and hasher.verify(row["password_hash"], password_value)
+        except HashingBusy:
+            flash(BUSY_MESSAGE, "warning")
+            return render_template("login.html"), 503
+
+        if ok:
+            if hasher.needs_rehash(row["password_hash"]):
+                rehash_password(row["id"], password_value)
             login_user(User(row["id"], row["login"]))
             flash("Вход выполнен успешно.", "success")
 
@@ -375,7 +349,12 @@ def change_password():
         }
 
         row = db_one("SELECT password_hash FROM users WHERE id=?", (current_user.id,))
-        if not row or not check_password_hash(row["password_hash"], form["old_password"]):
+        try:
+            old_ok = row is not None and hasher.verify(row["password_hash"], form["old_password"])
+        except HashingBusy:
+            flash(BUSY_MESSAGE, "warning")
+            return render_template("password.html", form=form, errors=errors), 503
+        if not old_ok:
             errors["old_password"] = "Старый пароль введён неверно."
 
         pw_errors = validate_password(form["new_password"])
@@ -389,10 +368,16 @@ def change_password():
             flash("Не удалось изменить пароль.", "danger")
             return render_template("password.html", form=form, errors=errors)
 
+        try:
+            password_hash = hasher.hash(form["new_password"])
+        except HashingBusy:
+            flash(BUSY_MESSAGE, "warning")
+            return render_template("password.html", form=form, errors=errors), 503
+
         try:
             db_exec(
                 "UPDATE users SET password_hash=? WHERE id=?",
-                (generate_password_hash(form["new_password"]), current_user.id),
+                (password_hash, current_user.id),
             )
         except Exception:
             flash("Ошибка записи в БД.", "danger")
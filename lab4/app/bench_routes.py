@@ -0,0 +1,39 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import gen_data
+import loadtest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон входа в lab4")
+    parser.add_argument("--users", type=int, default=1000)
+    loadtest.add_arguments(parser)
+    # вход упирается в KDF: десятки запросов в секунду, а не сотни
+    parser.set_defaults(requests=200, warmup=1)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    gen_data.generate(path, args.users)
+
+    from app import app
+
+    app.config["DB_PATH"] = path
+
+    scenarios = {
+        "login": lambda c: c.post("/login", {"login": "admin", "password": "Admin12345"}),
+        "login_wrong_password": lambda c: c.post("/login", {"login": "admin", "password": "Wrong12345"}),
+        "login_unknown_user": lambda c: c.post("/login", {"login": "nobody", "password": "Admin12345"}),
+    }
+    # без cookie каждый запрос — вход заново, а не редирект уже вошедшего
+    routes = loadtest.run_routes(app, scenarios, args, cookies=False)
+
+    config = {"mode": args.mode, "clients": args.clients, "users": args.users,
+              "hash_method": app.config["PASSWORD_HASH_METHOD"]}
+    sys.exit(loadtest.report("lab4", config, routes, args.baseline, args.save_baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
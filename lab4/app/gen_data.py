@@ -0,0 +1,78 @@
+import argparse
+import itertools
+import random
+import sqlite3
+import time
+
+from werkzeug.security import generate_password_hash
+
+import init_db
+
+BATCH_SIZE = 50000
+LAST_NAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов", "Новиков", "Фёдоров"]
+FIRST_NAMES = ["Александр", "Дмитрий", "Максим", "Сергей", "Андрей", "Алексей", "Артём", "Илья", "Кирилл", "Михаил"]
+MIDDLE_NAMES = ["Александрович", "Дмитриевич", "Сергеевич", "Андреевич", "Алексеевич", None]
+
+
+def batched(rows, size=BATCH_SIZE):
+    it = iter(rows)
+    while batch := list(itertools.islice(it, size)):
+        yield batch
+
+
+def generate_users(conn, count: int, password: str) -> None:
+    # один хэш на всех: считать KDF сотни тысяч раз незачем
+    password_hash = generate_password_hash(password)
+    role_id = conn.execute("SELECT id FROM roles WHERE name = ?", ("Пользователь",)).fetchone()[0]
+    start = conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0] + 1
+    rows = (
+        (
+            f"gen{i:07d}",
+            password_hash,
+            random.choice(LAST_NAMES),
+            random.choice(FIRST_NAMES),
+            random.choice(MIDDLE_NAMES),
+            role_id,
+        )
+        for i in range(start, start + count)
+    )
+    for batch in batched(rows):
+        conn.executemany(
+            """
+            INSERT INTO users(login, password_hash, last_name, first_name, middle_name, role_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            batch,
+        )
+
+
+def generate(path: str, users: int, password: str = "Password123", seed: int = 42) -> None:
+    init_db.main(path)
+    random.seed(seed)
+
+    conn = sqlite3.connect(path)
+    # на время загрузки: без fsync, журнал в памяти; всё — одной транзакцией
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA journal_mode=MEMORY")
+    with conn:
+        generate_users(conn, users, password)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Синтетические пользователи для lab4")
+    parser.add_argument("--db", default=init_db.DB_PATH)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--password", default="Password123", help="пароль всех созданных пользователей")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    generate(args.db, args.users, args.password, args.seed)
+    print(f"Создано пользователей: {args.users} за {time.perf_counter() - started:.1f} с -> {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,8 @@ DB_PATH = os.path.join(BASE_DIR, "app.db")
 SCHEMA_PATH = os.path.join(BASE_DIR, "schema.sql")
 
 
-def main():
-    conn = sqlite3.connect(DB_PATH)
+def main(path: str = DB_PATH):
+    conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys=ON")
 
@@ -49,7 +49,7 @@ def main():
 
     conn.commit()
     conn.close()
-    print("БД готова:", DB_PATH)
+    print("БД готова:", path)
 
 
 if __name__ == "__main__":
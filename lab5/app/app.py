@@ -1,7 +1,6 @@
 import os
-import re
 import sqlite3
-from flask import Flask, render_template, request, redirect, url_for, flash, abort
+from flask import Flask, render_template, request, redirect, url_for, flash, abort, jsonify
 from flask_login import (
     LoginManager,
     UserMixin,
@@ -10,9 +9,8 @@ from flask_login import (
     current_user,
     login_required,
 )
-from werkzeug.security import generate_password_hash, check_password_hash
 
-from db import get_db, close_db
+from db import get_db, get_pool, close_db, request_db_time
 from security import (
     check_rights,
     has_right,
@@ -22,12 +20,41 @@ from security import (
     is_admin,
 )
 from reports import bp as reports_bp
+from users_bulk import bp as users_bulk_bp, import_pool
+from visit_log import visit_writer
+from passwords import hasher, HashingBusy
+from metrics import metrics
+from user_cache import user_cache
+from validators import validate_user
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "change-me-ostapenko-241-327"
 app.config["DB_PATH"] = os.path.join(os.path.dirname(__file__), "app.db")
+# пул соединений и PRAGMA (см. db.DEFAULT_PRAGMAS), например {"synchronous": "FULL"}
+app.config["DB_POOL_SIZE"] = 8
+app.config["DB_PRAGMAS"] = {}
+# журнал посещений пишется пачками в фоне
+app.config["VISIT_LOG_FLUSH_INTERVAL"] = 1.0
+app.config["VISIT_LOG_BATCH_SIZE"] = 500
+app.config["VISIT_LOG_QUEUE_SIZE"] = 10000
+# хэширование паролей: метод/стоимость werkzeug и ограничение параллельности
+app.config["PASSWORD_HASH_METHOD"] = "scrypt:32768:8:1"
+app.config["PASSWORD_HASH_WORKERS"] = 2
+app.config["PASSWORD_HASH_MAX_PENDING"] = 16
+# кэш пользователей для user_loader: срок жизни записи, секунд, и размер
+app.config["USER_CACHE_TTL"] = 30.0
+app.config["USER_CACHE_SIZE"] = 10000
+# массовая загрузка пользователей через веб: процессов для хэширования (общий пул
+# на все загрузки, CPU для обычных запросов остаётся) и размер пачки
+app.config["USER_IMPORT_WORKERS"] = 2
+app.config["USER_IMPORT_BATCH_SIZE"] = 500
 
 app.teardown_appcontext(close_db)
+metrics.init_app(app, db_time=request_db_time)
+visit_writer.init_app(app)
+hasher.init_app(app)
+user_cache.init_app(app)
+import_pool.init_app(app)
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -36,45 +63,19 @@ login_manager.login_message = "Для доступа к запрашиваемо
 login_manager.login_message_category = "warning"
 
 app.register_blueprint(reports_bp)
+app.register_blueprint(users_bulk_bp)
 
-# --- validation from LR4 (оставляем) ---
-LOGIN_RE = re.compile(r"^[A-Za-z0-9]{5,}$")
-PWD_ALLOWED_RE = re.compile(r'^[A-Za-zА-Яа-яЁё0-9~!?@#$%^&*_\-+\(\)\[\]\{\}><\/\\\|"\'\.,:;]+$')
+BUSY_MESSAGE = "Сервер перегружен, повторите попытку через несколько секунд."
 
 
-def validate_login(login: str) -> str | None:
-    if not login:
-        return "Поле не может быть пустым."
-    if not LOGIN_RE.match(login):
-        return "Логин должен быть не короче 5 символов и содержать только латинские буквы и цифры."
-    return None
-
-
-def validate_required(value: str) -> str | None:
-    if not value:
-        return "Поле не может быть пустым."
-    return None
-
-
-def validate_password(pwd: str) -> list[str]:
-    errors: list[str] = []
-    if not pwd:
-        return ["Поле не может быть пустым."]
-    if len(pwd) < 8:
-        errors.append("Пароль должен быть не менее 8 символов.")
-    if len(pwd) > 128:
-        errors.append("Пароль должен быть не более 128 символов.")
-    if re.search(r"\s", pwd):
-        errors.append("Пароль не должен содержать пробелы.")
-    if not PWD_ALLOWED_RE.match(pwd):
-        errors.append("Пароль содержит недопустимые символы.")
-    if not re.search(r"[A-ZА-ЯЁ]", pwd):
-        errors.append("Пароль должен содержать хотя бы одну заглавную букву.")
-    if not re.search(r"[a-zа-яё]", pwd):
-        errors.append("Пароль должен содержать хотя бы одну строчную букву.")
-    if not re.search(r"[0-9]", pwd):
-        errors.append("Пароль должен содержать хотя бы одну цифру.")
-    return errors
+def rehash_password(user_id: int, password: str) -> None:
+    # параметры хэширования изменились — пересчитываем хэш при успешном входе
+    try:
+        password_hash = hasher.hash(password)
+    except HashingBusy:
+        return  # попробуем при следующем входе
+    get_db().execute("UPDATE users SET password_hash=? WHERE id=?", (password_hash, user_id))
+    get_db().commit()
 
 
 def roles_list():
@@ -107,6 +108,10 @@ class User(UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id: str):
+    # в установившемся режиме данные берутся из кэша, без обращения к users
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return User(*cached)
     row = get_db().execute(
         """
         SELECT u.id, u.login, r.name AS role_name
@@ -117,6 +122,7 @@ def load_user(user_id: str):
         (user_id,),
     ).fetchone()
     if row:
+        user_cache.put(user_id, (row["id"], row["login"], row["role_name"]))
         return User(row["id"], row["login"], row["role_name"])
     return None
 
@@ -124,22 +130,25 @@ def load_user(user_id: str):
 # --- visit logging ---
 @app.before_request
 def log_visit():
-    # не логируем статику и favicon
-    if request.path.startswith("/static") or request.path == "/favicon.ico":
+    # не логируем статику, favicon и проверку здоровья
+    if request.path.startswith("/static") or request.path in ("/favicon.ico", "/health", "/metrics"):
         return
 
     user_id = int(current_user.id) if current_user.is_authenticated else None
 
-    try:
-        db = get_db()
-        db.execute("INSERT INTO visit_logs(path, user_id) VALUES (?, ?)", (request.path, user_id))
-        db.commit()
-    except sqlite3.OperationalError:
-        # если БД еще не инициализирована
-        pass
+    # запрос платит только за постановку в очередь, запись делает фоновый поток
+    visit_writer.record(request.path, user_id)
 
 
 # --- routes ---
+@app.get("/health")
+def health():
+    status = get_pool().healthcheck()
+    status["visit_log"] = visit_writer.stats()
+    status["user_cache"] = user_cache.stats()
+    return jsonify(status), (200 if status["ok"] else 503)
+
+
 @app.get("/")
 def index():
     rows = get_db().execute(
@@ -202,21 +211,7 @@ def user_create():
             "role_id": request.form.get("role_id", "").strip(),
         }
 
-        e = validate_login(form["login"])
-        if e:
-            errors["login"] = e
-
-        pw_errors = validate_password(form["password"])
-        if pw_errors:
-            errors["password"] = pw_errors[0]
-
-        e = validate_required(form["last_name"])
-        if e:
-            errors["last_name"] = e
-
-        e = validate_required(form["first_name"])
-        if e:
-            errors["first_name"] = e
+        errors = validate_user(form)
 
         if errors:
             flash("Исправьте ошибки в форме.", "danger")
@@ -224,6 +219,12 @@ def user_create():
 
         role_id = int(form["role_id"]) if form["role_id"] else None
 
+        try:
+            password_hash = hasher.hash(form["password"])
+        except HashingBusy:
+            flash(BUSY_MESSAGE, "warning")
+            return render_template("user_create.html", roles=roles, form=form, errors=errors), 503
+
         try:
             get_db().execute(
                 """
@@ -232,7 +233,7 @@ def user_create():
                 """,
                 (
                     form["login"],
-                    generate_password_hash(form["password"]),
+                    password_hash,
                     form["last_name"],
                     form["first_name"],
                     form["middle_name"] or None,
@@ -276,13 +277,7 @@ def user_edit(user_id: int):
             "role_id": request.form.get("role_id", "").strip(),
         }
 
-        e = validate_required(form["last_name"])
-        if e:
-            errors["last_name"] = e
-
-        e = validate_required(form["first_name"])
-        if e:
-            errors["first_name"] = e
+        errors = validate_user(form, ("last_name", "first_name"))
 
         if errors:
             flash("Исправьте ошибки в форме.", "danger")
@@ -311,6 +306,10 @@ def user_edit(user_id: int):
                 (form["last_name"], form["first_name"], form["middle_name"] or None, role_id, user_id),
             )
             get_db().commit()
+            user_cache.invalidate(user_id)
+            if str(user_id) == current_user.id:
+                # роль текущего пользователя закэширована в current_user — обновляем её
+                current_user.role_name = next((r["name"] for r in roles if r["id"] == role_id), None)
         except Exception:
             flash("Ошибка записи в БД.", "danger")
             return render_template(
@@ -351,6 +350,7 @@ def user_delete(user_id: int):
     try:
         get_db().execute("DELETE FROM users WHERE id=?", (user_id,))
         get_db().commit()
+        user_cache.invalidate(user_id)
     except Exception:
         flash("Ошибка удаления пользователя.", "danger")
         return redirect(url_for("index"))
@@ -369,12 +369,25 @@ def login():
         password_value = request.form.get("password", "")
 
         row = get_db().execute(
-            "SELECT id, login, password_hash FROM users WHERE login = ?",
+            """
+            SELECT u.id, u.login, u.password_hash, r.name AS role_name
+            FROM users u
+            LEFT JOIN roles r ON r.id = u.role_id
+            WHERE u.login = ?
+            """,
             (login_value,),
         ).fetchone()
 
-        if row and check_password_hash(row["password_hash"], password_value):
-            login_user(User(row["id"], row["login"], None))
+        try:
+            ok = row is not None and hasher.verify(row["password_hash"], password_value)
+        except HashingBusy:
+            flash(BUSY_MESSAGE, "warning")
+            return render_template("login.html"), 503
+
+        if ok:
+            if hasher.needs_rehash(row["password_hash"]):
+                rehash_password(row["id"], password_value)
+            login_user(User(row["id"], row["login"], row["role_name"]))
             flash("Вход выполнен успешно.", "success")
             return redirect(url_for("index"))
 
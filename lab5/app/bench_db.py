@@ -0,0 +1,103 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import init_db
+from db import ConnectionPool, DEFAULT_PRAGMAS
+
+READ_SQL = """
+    SELECT u.id, u.login, u.last_name, u.first_name, u.middle_name, r.name AS role_name
+    FROM users u
+    LEFT JOIN roles r ON r.id = u.role_id
+    ORDER BY u.created_at DESC, u.id DESC
+"""
+WRITE_SQL = "INSERT INTO visit_logs(path, user_id) VALUES (?, ?)"
+
+
+# Старое поведение get_db(): новое соединение на каждый запрос, журнал по умолчанию
+class ConnectPerRequest:
+    def __init__(self, path):
+        self.path = path
+
+    def acquire(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def release(self, conn):
+        conn.close()
+
+
+def prepare_db(path):
+    init_db.main(path)
+
+
+def run(source, readers, writers, seconds):
+    stop = threading.Event()
+    counts = {"read": 0, "write": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def worker(kind):
+        done = errors = 0
+        while not stop.is_set():
+            conn = source.acquire()
+            try:
+                if kind == "read":
+                    conn.execute(READ_SQL).fetchall()
+                else:
+                    conn.execute(WRITE_SQL, ("/bench", None))
+                    conn.commit()
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+            finally:
+                source.release(conn)
+        with lock:
+            counts[kind] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=worker, args=("read",)) for _ in range(readers)]
+    threads += [threading.Thread(target=worker, args=("write",)) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    return {
+        "reads_per_sec": round(counts["read"] / seconds, 1),
+        "writes_per_sec": round(counts["write"] / seconds, 1),
+        "errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение get_db: соединение на запрос vs пул + WAL")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path = os.path.join(tmp, "connect.db")
+        new_path = os.path.join(tmp, "pool.db")
+        prepare_db(old_path)
+        prepare_db(new_path)
+
+        results = {
+            "connect-per-request": run(ConnectPerRequest(old_path), args.readers, args.writers, args.seconds),
+            "pool + WAL": run(ConnectionPool(new_path, DEFAULT_PRAGMAS), args.readers, args.writers, args.seconds),
+        }
+
+    print(f"readers={args.readers} writers={args.writers} seconds={args.seconds}")
+    for name, r in results.items():
+        print(f"{name:>20}: {r['reads_per_sec']:>9} reads/s {r['writes_per_sec']:>9} writes/s  errors={r['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import threading
+import time
+
+from passwords import PasswordHasher, HashingBusy
+
+METHODS = [
+    "pbkdf2:sha256:100000",
+    "pbkdf2:sha256:600000",
+    "scrypt:16384:8:1",
+    "scrypt:32768:8:1",
+]
+
+
+def run(method, workers, clients, seconds):
+    hasher = PasswordHasher(method, workers=workers, max_pending=clients)
+    stored = hasher.hash("Password123")
+    stop = threading.Event()
+    done = [0] * clients
+    rejected = [0] * clients
+
+    def client(i):
+        while not stop.is_set():
+            try:
+                hasher.verify(stored, "Password123")
+                done[i] += 1
+            except HashingBusy:
+                rejected[i] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return sum(done) / seconds, sum(rejected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пропускная способность проверки паролей при разной стоимости KDF")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--methods", nargs="+", default=METHODS)
+    args = parser.parse_args()
+
+    print(f"clients={args.clients} seconds={args.seconds}")
+    for method in args.methods:
+        for workers in args.workers:
+            rate, rejected = run(method, workers, args.clients, args.seconds)
+            print(f"{method:>24} workers={workers}: {rate:8.1f} проверок/с  отказов={rejected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import gen_data
+import loadtest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон основных маршрутов lab5")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--visits", type=int, default=100000)
+    loadtest.add_arguments(parser)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    gen_data.generate(path, args.users, args.visits)
+
+    from app import app, visit_writer
+
+    app.config["DB_PATH"] = path
+    visit_writer.db_path = path
+
+    def login(client):
+        client.post("/login", {"login": "admin", "password": "Admin12345"})
+
+    scenarios = {
+        "index": lambda c: c.get("/"),
+        "visits": lambda c: c.get("/visits/"),
+        "visits_pages_export": lambda c: c.get("/visits/pages/export"),
+    }
+    routes = loadtest.run_routes(app, scenarios, args, setup=login)
+    visit_writer.stop()
+
+    config = {"mode": args.mode, "clients": args.clients, "users": args.users, "visits": args.visits}
+    sys.exit(loadtest.report("lab5", config, routes, args.baseline, args.save_baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
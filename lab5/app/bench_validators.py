@@ -0,0 +1,126 @@
+import argparse
+import random
+import re
+import time
+
+import validators
+
+# --- прежняя реализация из app.py, для сравнения ---
+LOGIN_RE = re.compile(r"^[A-Za-z0-9]{5,}$")
+PWD_ALLOWED_RE = re.compile(r'^[A-Za-zА-Яа-яЁё0-9~!?@#$%^&*_\-+\(\)\[\]\{\}><\/\\\|"\'\.,:;]+$')
+
+
+def old_validate_login(login: str) -> str | None:
+    if not login:
+        return "Поле не может быть пустым."
+    if not LOGIN_RE.match(login):
+        return "Логин должен быть не короче 5 символов и содержать только латинские буквы и цифры."
+    return None
+
+
+def old_validate_required(value: str) -> str | None:
+    if not value:
+        return "Поле не может быть пустым."
+    return None
+
+
+def old_validate_password(pwd: str) -> list[str]:
+    errors: list[str] = []
+    if not pwd:
+        return ["Поле не может быть пустым."]
+    if len(pwd) < 8:
+        errors.append("Пароль должен быть не менее 8 символов.")
+    if len(pwd) > 128:
+        errors.append("Пароль должен быть не более 128 символов.")
+    if re.search(r"\s", pwd):
+        errors.append("Пароль не должен содержать пробелы.")
+    if not PWD_ALLOWED_RE.match(pwd):
+        errors.append("Пароль содержит недопустимые символы.")
+    if not re.search(r"[A-ZА-ЯЁ]", pwd):
+        errors.append("Пароль должен содержать хотя бы одну заглавную букву.")
+    if not re.search(r"[a-zа-яё]", pwd):
+        errors.append("Пароль должен содержать хотя бы одну строчную букву.")
+    if not re.search(r"[0-9]", pwd):
+        errors.append("Пароль должен содержать хотя бы одну цифру.")
+    return errors
+
+
+def old_validate_user(form: dict) -> dict[str, str]:
+    errors = {}
+    e = old_validate_login(form["login"])
+    if e:
+        errors["login"] = e
+    pw_errors = old_validate_password(form["password"])
+    if pw_errors:
+        errors["password"] = pw_errors[0]
+    e = old_validate_required(form["last_name"])
+    if e:
+        errors["last_name"] = e
+    e = old_validate_required(form["first_name"])
+    if e:
+        errors["first_name"] = e
+    return errors
+
+
+# --- данные ---
+# без \n: старый PWD_ALLOWED_RE из-за «$» пропускал перевод строки в конце пароля
+ALPHABET = "abcxyzABCXYZабвэюяАБВЭЮЯёЁ0123456789!?@#_-+.,:; \t€№é"
+
+
+def make_rows(n: int) -> list[dict]:
+    # половина паролей корректна — как в реальных формах и выгрузках
+    rows = []
+    for i in range(n):
+        if i % 2:
+            password = "".join(random.choices(ALPHABET, k=random.choice([0, 5, 10, 14, 20, 140])))
+        else:
+            password = f"Passw0rd!{i}"
+        rows.append({
+            "login": random.choice([f"user{i}", "usr", "", f"юзер{i}", f"user{i}"]),
+            "password": password,
+            "last_name": random.choice(["Иванов", ""]),
+            "first_name": random.choice(["Иван", ""]),
+        })
+    return rows
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка форм пользователей: прежние regex против validators.py")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(42)
+    rows = make_rows(args.rows)
+    passwords = [row["password"] for row in rows]
+
+    mismatches = [p for p in passwords if old_validate_password(p) != validators.validate_password(p)]
+    mismatches += [r for r in rows if old_validate_user(r) != validators.validate_user(r)]
+    print(f"строк: {args.rows}, расхождений с прежней реализацией: {len(mismatches)}")
+
+    cases = [
+        ("validate_password", lambda: [old_validate_password(p) for p in passwords],
+         lambda: [validators.validate_password(p) for p in passwords]),
+        ("форма пользователя", lambda: [old_validate_user(r) for r in rows],
+         lambda: [validators.validate_user(r) for r in rows]),
+        ("пакет (validate_users)", lambda: [old_validate_user(r) for r in rows],
+         lambda: list(validators.validate_users(rows))),
+    ]
+    for label, old, new in cases:
+        old_s = timed(old, args.repeat)
+        new_s = timed(new, args.repeat)
+        print(f"{label:>24}: было {old_s / len(rows) * 1e6:6.2f} мкс/строка, "
+              f"стало {new_s / len(rows) * 1e6:6.2f} мкс/строка ({old_s / new_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import csv
+import io
+from flask import Response, stream_with_context
+
+FETCH_SIZE = 500
+
+
+# query — функция, возвращающая курсор. Вызываем её уже внутри генератора:
+# соединение из get_db() закрывается в teardown до начала отдачи ответа.
+def iter_csv(query, header, row_fn, fetch_size: int = FETCH_SIZE):
+    cursor = query()
+
+    # BOM — чтобы Excel открыл файл в UTF-8
+    buf = io.StringIO()
+    w = csv.writer(buf, delimiter=";")
+    buf.write("\ufeff")
+    w.writerow(header)
+
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        for r in rows:
+            w.writerow(row_fn(r))
+        yield buf.getvalue().encode("utf-8")
+        # буфер переиспользуем: в памяти всегда не больше одной пачки
+        buf.seek(0)
+        buf.truncate()
+
+    tail = buf.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def csv_response(query, header, row_fn, filename: str) -> Response:
+    return Response(
+        stream_with_context(iter_csv(query, header, row_fn)),
+        mimetype="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
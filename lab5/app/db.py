@@ -1,17 +1,193 @@
+import os
+import queue
 import sqlite3
-from flask import g, current_app
+import threading
+import time
+from flask import g, current_app, has_request_context
+
+# PRAGMA по умолчанию: WAL позволяет читателям не ждать писателя,
+# synchronous=NORMAL в режиме WAL безопасен и не делает fsync на каждый commit
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": 5000,
+    "cache_size": -16000,  # ~16 МБ на соединение
+    "mmap_size": 128 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+def _add_db_time(elapsed: float) -> None:
+    if has_request_context():
+        g.db_time = g.get("db_time", 0.0) + elapsed
+
+
+class TimedCursor(sqlite3.Cursor):
+    # время выполнения запросов и выборки строк копится в g.db_time (для metrics)
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _add_db_time(time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _add_db_time(time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            _add_db_time(time.perf_counter() - started)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            _add_db_time(time.perf_counter() - started)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            _add_db_time(time.perf_counter() - started)
+
+
+class TimedConnection(sqlite3.Connection):
+    # Connection.execute из C создаёт обычный курсор, поэтому переопределяем
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def request_db_time() -> float:
+    return g.get("db_time", 0.0)
+
+
+def connect(path: str, pragmas: dict | None = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False, factory=TimedConnection)
+    conn.row_factory = sqlite3.Row
+    for name, value in (pragmas or DEFAULT_PRAGMAS).items():
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+class ConnectionPool:
+    def __init__(self, path: str, pragmas: dict | None = None, size: int = 8, healthcheck_interval: float = 30.0):
+        self.path = path
+        self.pragmas = dict(pragmas or DEFAULT_PRAGMAS)
+        self.size = size
+        self.healthcheck_interval = healthcheck_interval
+        self.pid = os.getpid()
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.discarded = 0
+
+    def acquire(self) -> sqlite3.Connection:
+        while True:
+            try:
+                conn, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    self.created += 1
+                return connect(self.path, self.pragmas)
+            if time.monotonic() - released_at < self.healthcheck_interval or self._is_alive(conn):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait((conn, time.monotonic()))
+        except (queue.Full, sqlite3.Error):
+            self._discard(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+
+    def healthcheck(self) -> dict:
+        conn = self.acquire()
+        try:
+            ok = self._is_alive(conn)
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0] if ok else None
+        finally:
+            self.release(conn)
+        return {
+            "ok": ok,
+            "journal_mode": journal_mode,
+            "idle": self._idle.qsize(),
+            "created": self.created,
+            "discarded": self.discarded,
+        }
+
+    def _is_alive(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self.discarded += 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+_pool_lock = threading.Lock()
+
+
+def pragmas_from_config(config) -> dict:
+    return {**DEFAULT_PRAGMAS, **config.get("DB_PRAGMAS", {})}
+
+
+def get_pool() -> ConnectionPool:
+    pool = current_app.extensions.get("db_pool")
+    path = current_app.config["DB_PATH"]
+    # после fork соединения родителя использовать нельзя — заводим свой пул
+    if pool is not None and pool.pid == os.getpid() and pool.path == path:
+        return pool
+    with _pool_lock:
+        pool = current_app.extensions.get("db_pool")
+        if pool is None or pool.pid != os.getpid() or pool.path != path:
+            pool = ConnectionPool(
+                path,
+                pragmas_from_config(current_app.config),
+                size=current_app.config.get("DB_POOL_SIZE", 8),
+            )
+            current_app.extensions["db_pool"] = pool
+    return pool
 
 
 def get_db():
     if "db" not in g:
-        conn = sqlite3.connect(current_app.config["DB_PATH"])
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA foreign_keys=ON")
-        g.db = conn
+        g.db = get_pool().acquire()
     return g.db
 
 
 def close_db(_exc=None):
     db = g.pop("db", None)
     if db is not None:
-        db.close()
\ No newline at end of file
+        get_pool().release(db)
@@ -0,0 +1,142 @@
+import argparse
+import itertools
+import random
+import sqlite3
+import time
+
+from werkzeug.security import generate_password_hash
+
+import init_db
+import visit_stats
+
+BATCH_SIZE = 50000
+LAST_NAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов", "Новиков", "Фёдоров"]
+FIRST_NAMES = ["Александр", "Дмитрий", "Максим", "Сергей", "Андрей", "Алексей", "Артём", "Илья", "Кирилл", "Михаил"]
+MIDDLE_NAMES = ["Александрович", "Дмитриевич", "Сергеевич", "Андреевич", "Алексеевич", None]
+PAGES = ["/", "/visits/", "/visits/pages", "/visits/users", "/users/create", "/login"]
+# индексы журнала пересоздаются после загрузки (schema.sql): так быстрее, чем обновлять их на каждую строку
+VISIT_LOG_INDEXES = [
+    "idx_visit_logs_created_at",
+    "idx_visit_logs_user_id",
+    "idx_visit_logs_path",
+    "idx_visit_logs_user_created_at_id",
+]
+
+
+def zipf_cum_weights(n: int, skew: float) -> list:
+    # вес k-го элемента ~ 1 / k^skew; skew=0 — равномерное распределение
+    return list(itertools.accumulate(1 / k ** skew for k in range(1, n + 1)))
+
+
+def batched(rows, size=BATCH_SIZE):
+    it = iter(rows)
+    while batch := list(itertools.islice(it, size)):
+        yield batch
+
+
+def generate_users(conn, count: int, password: str) -> None:
+    # один хэш на всех: считать KDF сотни тысяч раз незачем
+    password_hash = generate_password_hash(password)
+    role_id = conn.execute("SELECT id FROM roles WHERE name = ?", ("Пользователь",)).fetchone()[0]
+    start = conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0] + 1
+    rows = (
+        (
+            f"gen{i:07d}",
+            password_hash,
+            random.choice(LAST_NAMES),
+            random.choice(FIRST_NAMES),
+            random.choice(MIDDLE_NAMES),
+            role_id,
+        )
+        for i in range(start, start + count)
+    )
+    for batch in batched(rows):
+        conn.executemany(
+            """
+            INSERT INTO users(login, password_hash, last_name, first_name, middle_name, role_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            batch,
+        )
+
+
+def generate_visits(conn, count: int, days: int, path_count: int, path_skew: float,
+                    user_skew: float, anonymous: float) -> None:
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users")]
+    random.shuffle(user_ids)  # «активные» пользователи — не обязательно первые по id
+    user_weights = zipf_cum_weights(len(user_ids), user_skew)
+
+    profile_paths = [f"/users/{user_id}" for user_id in user_ids[:max(0, path_count - len(PAGES))]]
+    paths = PAGES + profile_paths
+    path_weights = zipf_cum_weights(len(paths), path_skew)
+
+    # время растёт вместе с id, как в настоящем журнале; в строку его
+    # переводит SQLite (datetime(?, 'unixepoch')) — strftime в Python заметно дольше
+    start = int(time.time()) - days * 86400
+    step = days * 86400 / max(count, 1)
+
+    done = 0
+    while done < count:
+        n = min(BATCH_SIZE, count - done)
+        chosen_paths = random.choices(paths, cum_weights=path_weights, k=n)
+        chosen_users = random.choices(user_ids, cum_weights=user_weights, k=n)
+        rows = [
+            (
+                chosen_paths[i],
+                None if random.random() < anonymous else chosen_users[i],
+                start + int((done + i) * step),
+            )
+            for i in range(n)
+        ]
+        conn.executemany(
+            "INSERT INTO visit_logs(path, user_id, created_at) VALUES (?, ?, datetime(?, 'unixepoch'))", rows
+        )
+        done += n
+
+
+def generate(path: str, users: int, visits: int, days: int = 90, paths: int = 500,
+             path_skew: float = 1.1, user_skew: float = 1.0, anonymous: float = 0.3,
+             password: str = "Password123", seed: int = 42) -> None:
+    init_db.main(path)
+    random.seed(seed)
+
+    conn = sqlite3.connect(path)
+    # на время загрузки: без fsync, журнал в памяти; всё — одной транзакцией
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA journal_mode=MEMORY")
+    with conn:
+        for name in VISIT_LOG_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        generate_users(conn, users, password)
+        generate_visits(conn, visits, days, paths, path_skew, user_skew, anonymous)
+    with open(init_db.SCHEMA_PATH, "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+    visit_stats.backfill(conn)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Синтетические данные для lab5: пользователи и журнал посещений")
+    parser.add_argument("--db", default=init_db.DB_PATH)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--visits", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=90, help="за сколько дней растянуть журнал")
+    parser.add_argument("--paths", type=int, default=500, help="число различных страниц")
+    parser.add_argument("--path-skew", type=float, default=1.1, help="показатель Ципфа для страниц")
+    parser.add_argument("--user-skew", type=float, default=1.0, help="показатель Ципфа для пользователей")
+    parser.add_argument("--anonymous", type=float, default=0.3, help="доля анонимных посещений")
+    parser.add_argument("--password", default="Password123", help="пароль всех созданных пользователей")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    generate(args.db, args.users, args.visits, args.days, args.paths, args.path_skew,
+             args.user_skew, args.anonymous, args.password, args.seed)
+    print(f"Создано пользователей: {args.users}, посещений: {args.visits} "
+          f"за {time.perf_counter() - started:.1f} с -> {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,26 @@ import os
 import sqlite3
 from werkzeug.security import generate_password_hash
 
+import visit_stats
+
 BASE_DIR = os.path.dirname(__file__)
 DB_PATH = os.path.join(BASE_DIR, "app.db")
 SCHEMA_PATH = os.path.join(BASE_DIR, "schema.sql")
 
 
-def main():
-    conn = sqlite3.connect(DB_PATH)
+def main(path: str = DB_PATH):
+    conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys=ON")
 
     with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
         conn.executescript(f.read())
 
+    # БД создана до появления итогов — пересчитываем агрегаты по журналу
+    has_visits = conn.execute("SELECT 1 FROM visit_logs LIMIT 1").fetchone() is not None
+    if has_visits and conn.execute("SELECT 1 FROM visit_totals").fetchone() is None:
+        visit_stats.backfill(conn)
+
     # seed roles
     roles_count = conn.execute("SELECT COUNT(*) AS c FROM roles").fetchone()["c"]
     if roles_count == 0:
@@ -67,7 +74,7 @@ def main():
 
     conn.commit()
     conn.close()
-    print("БД готова:", DB_PATH)
+    print("БД готова:", path)
 
 
 if __name__ == "__main__":
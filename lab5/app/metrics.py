@@ -0,0 +1,140 @@
+import bisect
+import threading
+import time
+from flask import Response, g, request, before_render_template, template_rendered
+
+# границы корзин гистограмм, секунды
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self, lines: list) -> None:
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} counter")
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{{{_labels(self.labels, label_values)}}} {value}")
+
+
+class Histogram:
+    # в корзинах хранятся не накопленные счётчики: observe — один bisect и
+    # два сложения под блокировкой, накопление делается при выдаче /metrics
+    def __init__(self, name: str, help: str, labels: tuple, buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self, lines: list) -> None:
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for label_values, counts, total in series:
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+
+
+class Metrics:
+    # Задержки запросов по endpoint: полное время обработки, время рендеринга
+    # шаблонов и время в БД. Значения хранятся в памяти процесса — при
+    # нескольких воркерах каждый отдаёт свои, суммирует их Prometheus.
+    def __init__(self, buckets=BUCKETS):
+        self.requests = Counter("http_requests_total", "Обработано запросов", ("endpoint", "method", "status"))
+        self.request_duration = Histogram(
+            "http_request_duration_seconds", "Время обработки запроса", ("endpoint",), buckets)
+        self.template_duration = Histogram(
+            "template_render_seconds", "Время рендеринга шаблонов за запрос", ("endpoint",), buckets)
+        self.db_duration = Histogram(
+            "db_time_seconds", "Время выполнения SQL за запрос", ("endpoint",), buckets)
+        self.db_time = None
+
+    def init_app(self, app, db_time=None):
+        # db_time — функция без аргументов, возвращающая время в БД текущего запроса
+        self.db_time = db_time
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._start_render, app)
+        template_rendered.connect(self._finish_render, app)
+        app.add_url_rule(app.config.get("METRICS_PATH", "/metrics"), "metrics", self.view)
+        app.extensions["metrics"] = self
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = g.pop("metrics_started", None)
+        if started is None or request.endpoint == "metrics":
+            return response
+        endpoint = request.endpoint or "none"
+        self.request_duration.observe(time.perf_counter() - started, endpoint)
+        self.requests.inc(endpoint, request.method, response.status_code)
+        template_time = g.pop("metrics_template_time", None)
+        if template_time is not None:
+            self.template_duration.observe(template_time, endpoint)
+        db_time = self.db_time() if self.db_time is not None else None
+        if db_time:
+            self.db_duration.observe(db_time, endpoint)
+        return response
+
+    def _start_render(self, sender, template, context, **extra):
+        g.setdefault("metrics_render_started", []).append(time.perf_counter())
+
+    def _finish_render(self, sender, template, context, **extra):
+        stack = g.get("metrics_render_started")
+        if not stack:
+            return
+        elapsed = time.perf_counter() - stack.pop()
+        # вложенный рендеринг уже входит во время внешнего шаблона
+        if not stack:
+            g.metrics_template_time = g.get("metrics_template_time", 0.0) + elapsed
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.requests, self.request_duration, self.template_duration, self.db_duration):
+            metric.render(lines)
+        return "\n".join(lines) + "\n"
+
+    def view(self):
+        return Response(self.render(), content_type=CONTENT_TYPE)
+
+
+metrics = Metrics()
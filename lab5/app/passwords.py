@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+# метод и параметры стоимости в формате werkzeug:
+# "scrypt:N:r:p" или "pbkdf2:sha256:итерации"
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def method_prefix(method: str) -> str:
+    # начало хэша ("метод$соль$хэш") для method, с параметрами по умолчанию,
+    # как их раскрывает werkzeug ("scrypt" -> "scrypt:32768:8:1"), но без расчёта KDF
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n, r, p = map(int, args) if args else (2**15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    return method
+
+
+# Хэширование паролей в ограниченном пуле потоков: одновременно считается
+# не больше workers KDF, ещё max_pending ждут в очереди, остальные запросы
+# сразу получают HashingBusy — волна логинов не занимает весь CPU.
+class PasswordHasher:
+    def __init__(self, method=DEFAULT_METHOD, workers=2, max_pending=16):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self._prefix = method_prefix(method)
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get("PASSWORD_HASH_METHOD", self.method)
+        self._prefix = method_prefix(self.method)
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.max_pending = app.config.get("PASSWORD_HASH_MAX_PENDING", self.max_pending)
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+        app.extensions["passwords"] = self
+
+    def hash(self, password: str) -> str:
+        return self._submit(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._submit(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        # хэш хранится как "метод$соль$хэш"; параметры изменились — пересчитываем
+        return password_hash.split("$", 1)[0] != self._prefix
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+
+hasher = PasswordHasher()
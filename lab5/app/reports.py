@@ -1,8 +1,10 @@
-import csv
-import io
-from flask import Blueprint, render_template, request, Response
+import base64
+import json
+from datetime import date
+from flask import Blueprint, render_template, request
 from flask_login import login_required, current_user
 
+from csv_export import csv_response
 from db import get_db
 from security import check_rights, is_admin
 
@@ -16,46 +18,143 @@ def fio_from_user_row(u) -> str:
     return " ".join([p for p in parts if p])
 
 
-@bp.get("/")
-@login_required
-@check_rights("visits.view")
-def journal():
-    page = request.args.get("page", "1")
-    try:
-        page = max(1, int(page))
-    except Exception:
-        page = 1
+# Отчёты читают готовые итоги (visit_path_totals, visit_user_totals), а не
+# visit_logs: стоимость зависит от числа страниц и пользователей, а не посещений.
+# Отчёт по страницам одного пользователя берётся из visit_stats по
+# покрывающему индексу idx_visit_stats_user_path.
+def pages_stats():
+    if not is_admin():
+        return get_db().execute(
+            """
+            SELECT path, SUM(visits) AS c
+            FROM visit_stats
+            WHERE user_id = ?
+            GROUP BY path
+            ORDER BY c DESC, path ASC
+            """,
+            (int(current_user.id),),
+        )
+
+    return get_db().execute(
+        """
+        SELECT path, visits AS c
+        FROM visit_path_totals
+        ORDER BY c DESC, path ASC
+        """
+    )
+
 
+def users_stats():
     where = ""
     params = []
-
     if not is_admin():
-        where = "WHERE v.user_id = ?"
+        where = "WHERE t.user_id = ?"
         params.append(int(current_user.id))
 
-    total = get_db().execute(
-        f"SELECT COUNT(*) AS c FROM visit_logs v {where}",
+    # итоги уже сгруппированы по user_id, users присоединяется к ним; удалённые
+    # пользователи (нет строки в users) сливаются с неаутентифицированными,
+    # как и в visit_logs после ON DELETE SET NULL
+    return get_db().execute(
+        f"""
+        SELECT u.id AS user_id,
+               CASE
+                 WHEN u.id IS NULL THEN 'Неаутентифицированный пользователь'
+                 ELSE (u.last_name || ' ' || u.first_name || CASE WHEN u.middle_name IS NOT NULL THEN ' ' || u.middle_name ELSE '' END)
+               END AS who,
+               SUM(t.visits) AS c
+        FROM visit_user_totals t
+        LEFT JOIN users u ON u.id = t.user_id
+        {where}
+        GROUP BY u.id
+        ORDER BY c DESC, who ASC
+        """,
         params,
-    ).fetchone()["c"]
+    )
+
+
+def encode_cursor(row, page: int) -> str:
+    raw = json.dumps([row["created_at"], row["id"], page], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str | None):
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, row_id, page = json.loads(raw)
+        return str(created_at), int(row_id), max(1, int(page))
+    except Exception:
+        return None
+
+
+def journal_total(user_id: int | None) -> int:
+    # общее число ведётся вместе с агрегатами — читаем одну строку,
+    # а не COUNT(*) по журналу или SUM по visit_stats
+    if user_id is None:
+        row = get_db().execute("SELECT visits FROM visit_totals WHERE id = 1").fetchone()
+    else:
+        row = get_db().execute("SELECT visits FROM visit_user_totals WHERE user_id = ?", (user_id,)).fetchone()
+    return row["visits"] if row else 0
 
-    pages = max(1, (total + PER_PAGE - 1) // PER_PAGE)
-    page = min(page, pages)
-    offset = (page - 1) * PER_PAGE
+
+# Журнал листается курсором по (created_at, id) — см. индексы idx_visit_logs_*_id:
+# каждая страница — это поиск по индексу, а не OFFSET через все предыдущие строки.
+@bp.get("/")
+@login_required
+@check_rights("visits.view")
+def journal():
+    after = decode_cursor(request.args.get("after"))
+    before = None if after else decode_cursor(request.args.get("before"))
+
+    conditions = []
+    params = []
+
+    user_id = None if is_admin() else int(current_user.id)
+    if user_id is not None:
+        conditions.append("v.user_id = ?")
+        params.append(user_id)
+
+    order = "DESC"
+    page = 1
+    if after:
+        conditions.append("(v.created_at, v.id) < (?, ?)")
+        params += [after[0], after[1]]
+        page = after[2] + 1
+    elif before:
+        # назад идём в обратном порядке и переворачиваем результат
+        conditions.append("(v.created_at, v.id) > (?, ?)")
+        params += [before[0], before[1]]
+        order = "ASC"
+        page = max(1, before[2] - 1)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 
     rows = get_db().execute(
         f"""
-        SELECT v.id, v.path,
+        SELECT v.id, v.path, v.created_at,
                strftime('%d.%m.%Y %H:%M:%S', v.created_at) AS dt,
                u.last_name, u.first_name, u.middle_name
         FROM visit_logs v
         LEFT JOIN users u ON u.id = v.user_id
         {where}
-        ORDER BY v.created_at DESC, v.id DESC
-        LIMIT ? OFFSET ?
+        ORDER BY v.created_at {order}, v.id {order}
+        LIMIT ?
         """,
-        params + [PER_PAGE, offset],
+        params + [PER_PAGE + 1],
     ).fetchall()
 
+    has_more = len(rows) > PER_PAGE
+    rows = rows[:PER_PAGE]
+    if before:
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, after is not None
+
+    if before and not has_prev:
+        page = 1
+
     logs = []
     for r in rows:
         if r["last_name"] is None:
@@ -64,11 +163,16 @@ def journal():
             who = fio_from_user_row(r)
         logs.append({"path": r["path"], "dt": r["dt"], "who": who})
 
+    total = journal_total(user_id)
+    pages = max(1, (total + PER_PAGE - 1) // PER_PAGE, page)
+
     return render_template(
         "visits.html",
         logs=logs,
         page=page,
         pages=pages,
+        next_cursor=encode_cursor(rows[-1], page) if rows and has_next else None,
+        prev_cursor=encode_cursor(rows[0], page) if rows and has_prev else None,
     )
 
 
@@ -76,22 +180,7 @@ def journal():
 @login_required
 @check_rights("visits.view")
 def pages_report():
-    where = ""
-    params = []
-    if not is_admin():
-        where = "WHERE user_id = ?"
-        params.append(int(current_user.id))
-
-    rows = get_db().execute(
-        f"""
-        SELECT path, COUNT(*) AS c
-        FROM visit_logs
-        {where}
-        GROUP BY path
-        ORDER BY c DESC, path ASC
-        """,
-        params,
-    ).fetchall()
+    rows = pages_stats().fetchall()
 
     data = [{"path": r["path"], "count": r["c"]} for r in rows]
     return render_template("report_pages.html", data=data)
@@ -101,34 +190,11 @@ def pages_report():
 @login_required
 @check_rights("visits.view")
 def pages_export():
-    where = ""
-    params = []
-    if not is_admin():
-        where = "WHERE user_id = ?"
-        params.append(int(current_user.id))
-
-    rows = get_db().execute(
-        f"""
-        SELECT path, COUNT(*) AS c
-        FROM visit_logs
-        {where}
-        GROUP BY path
-        ORDER BY c DESC, path ASC
-        """,
-        params,
-    ).fetchall()
-
-    out = io.StringIO()
-    w = csv.writer(out, delimiter=";")
-    w.writerow(["Страница", "Количество посещений"])
-    for r in rows:
-        w.writerow([r["path"], r["c"]])
-
-    content = "\ufeff" + out.getvalue()
-    return Response(
-        content,
-        mimetype="text/csv; charset=utf-8",
-        headers={"Content-Disposition": "attachment; filename=pages_report.csv"},
+    return csv_response(
+        pages_stats,
+        ["Страница", "Количество посещений"],
+        lambda r: [r["path"], r["c"]],
+        "pages_report.csv",
     )
 
 
@@ -136,28 +202,7 @@ def pages_export():
 @login_required
 @check_rights("visits.view")
 def users_report():
-    where = ""
-    params = []
-    if not is_admin():
-        where = "WHERE v.user_id = ?"
-        params.append(int(current_user.id))
-
-    rows = get_db().execute(
-        f"""
-        SELECT v.user_id,
-               CASE
-                 WHEN v.user_id IS NULL THEN 'Неаутентифицированный пользователь'
-                 ELSE (u.last_name || ' ' || u.first_name || CASE WHEN u.middle_name IS NOT NULL THEN ' ' || u.middle_name ELSE '' END)
-               END AS who,
-               COUNT(*) AS c
-        FROM visit_logs v
-        LEFT JOIN users u ON u.id = v.user_id
-        {where}
-        GROUP BY v.user_id
-        ORDER BY c DESC, who ASC
-        """,
-        params,
-    ).fetchall()
+    rows = users_stats().fetchall()
 
     data = [{"who": r["who"], "count": r["c"]} for r in rows]
     return render_template("report_users.html", data=data)
@@ -167,38 +212,62 @@ def users_report():
 @login_required
 @check_rights("visits.view")
 def users_export():
-    where = ""
+    return csv_response(
+        users_stats,
+        ["Пользователь", "Количество посещений"],
+        lambda r: [r["who"], r["c"]],
+        "users_report.csv",
+    )
+
+
+def parse_date(value: str | None) -> str | None:
+    try:
+        return date.fromisoformat(value).isoformat() if value else None
+    except ValueError:
+        return None
+
+
+@bp.get("/export")
+@login_required
+@check_rights("visits.view")
+def journal_export():
+    conditions = []
     params = []
+
     if not is_admin():
-        where = "WHERE v.user_id = ?"
+        conditions.append("v.user_id = ?")
         params.append(int(current_user.id))
 
-    rows = get_db().execute(
-        f"""
-        SELECT v.user_id,
-               CASE
-                 WHEN v.user_id IS NULL THEN 'Неаутентифицированный пользователь'
-                 ELSE (u.last_name || ' ' || u.first_name || CASE WHEN u.middle_name IS NOT NULL THEN ' ' || u.middle_name ELSE '' END)
-               END AS who,
-               COUNT(*) AS c
+    # границы включительные: date_to=2026-01-31 включает весь день 31 января
+    date_from = parse_date(request.args.get("date_from"))
+    if date_from:
+        conditions.append("v.created_at >= ?")
+        params.append(date_from)
+
+    date_to = parse_date(request.args.get("date_to"))
+    if date_to:
+        conditions.append("v.created_at < date(?, '+1 day')")
+        params.append(date_to)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    sql = f"""
+        SELECT v.path,
+               strftime('%d.%m.%Y %H:%M:%S', v.created_at) AS dt,
+               u.last_name, u.first_name, u.middle_name
         FROM visit_logs v
         LEFT JOIN users u ON u.id = v.user_id
         {where}
-        GROUP BY v.user_id
-        ORDER BY c DESC, who ASC
-        """,
-        params,
-    ).fetchall()
-
-    out = io.StringIO()
-    w = csv.writer(out, delimiter=";")
-    w.writerow(["Пользователь", "Количество посещений"])
-    for r in rows:
-        w.writerow([r["who"], r["c"]])
-
-    content = "\ufeff" + out.getvalue()
-    return Response(
-        content,
-        mimetype="text/csv; charset=utf-8",
-        headers={"Content-Disposition": "attachment; filename=users_report.csv"},
+        ORDER BY v.created_at, v.id
+    """
+
+    def row(r):
+        who = "Неаутентифицированный пользователь" if r["last_name"] is None else fio_from_user_row(r)
+        return [who, r["path"], r["dt"]]
+
+    return csv_response(
+        lambda: get_db().execute(sql, params),
+        ["Пользователь", "Страница", "Дата"],
+        row,
+        "visit_logs.csv",
     )
\ No newline at end of file
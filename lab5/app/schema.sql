@@ -28,4 +28,40 @@ CREATE TABLE IF NOT EXISTS visit_logs (
 
 CREATE INDEX IF NOT EXISTS idx_visit_logs_created_at ON visit_logs(created_at);
 CREATE INDEX IF NOT EXISTS idx_visit_logs_user_id ON visit_logs(user_id);
-CREATE INDEX IF NOT EXISTS idx_visit_logs_path ON visit_logs(path);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_visit_logs_path ON visit_logs(path);
+-- агрегаты журнала по дням: обновляются вместе с записью visit_logs
+CREATE TABLE IF NOT EXISTS visit_stats (
+  day TEXT NOT NULL,
+  path TEXT NOT NULL,
+  user_id INTEGER,
+  visits INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_visit_stats_key ON visit_stats(day, path, IFNULL(user_id, 0));
+-- отчёт по страницам одного пользователя читает только этот индекс, без таблицы
+CREATE INDEX IF NOT EXISTS idx_visit_stats_user_path ON visit_stats(user_id, path, visits);
+DROP INDEX IF EXISTS idx_visit_stats_path;
+DROP INDEX IF EXISTS idx_visit_stats_user_id;
+
+-- итоги за всё время по странице и по пользователю (0 — неаутентифицированный):
+-- их читают отчёты, обновляются тем же upsert'ом, что и visit_stats
+CREATE TABLE IF NOT EXISTS visit_path_totals (
+  path TEXT PRIMARY KEY,
+  visits INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS visit_user_totals (
+  user_id INTEGER PRIMARY KEY,
+  visits INTEGER NOT NULL DEFAULT 0
+);
+
+-- всего посещений (одна строка) — число страниц журнала без COUNT(*) по visit_logs
+CREATE TABLE IF NOT EXISTS visit_totals (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  visits INTEGER NOT NULL DEFAULT 0
+);
+
+-- курсорная пагинация журнала: поиск по (created_at, id) вместо OFFSET;
+-- для общего журнала хватает idx_visit_logs_created_at — id это rowid, он уже в индексе
+DROP INDEX IF EXISTS idx_visit_logs_created_at_id;
+CREATE INDEX IF NOT EXISTS idx_visit_logs_user_created_at_id ON visit_logs(user_id, created_at, id);
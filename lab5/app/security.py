@@ -1,7 +1,6 @@
 from functools import wraps
 from flask import flash, redirect, url_for
 from flask_login import current_user
-from db import get_db
 
 ADMIN = "Администратор"
 USER = "Пользователь"
@@ -11,6 +10,8 @@ ADMIN_RIGHTS = {
     "users.edit",
     "users.view",
     "users.delete",
+    "users.import",
+    "users.export",
     "visits.view",
 }
 
@@ -24,16 +25,9 @@ USER_RIGHTS = {
 def current_role_name() -> str | None:
     if not current_user.is_authenticated:
         return None
-    row = get_db().execute(
-        """
-        SELECT r.name AS role_name
-        FROM users u
-        LEFT JOIN roles r ON r.id = u.role_id
-        WHERE u.id = ?
-        """,
-        (int(current_user.id),),
-    ).fetchone()
-    return row["role_name"] if row else None
+    # роль подгружается один раз вместе с пользователем в load_user,
+    # поэтому проверки прав в шаблонах не ходят в БД на каждую строку
+    return current_user.role_name
 
 
 def is_admin() -> bool:
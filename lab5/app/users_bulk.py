@@ -0,0 +1,341 @@
+import argparse
+import atexit
+import csv
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from flask import Blueprint, Response, current_app, flash, jsonify, render_template, request, stream_with_context
+from flask_login import login_required
+from werkzeug.security import generate_password_hash
+
+import init_db
+from csv_export import FETCH_SIZE, csv_response, iter_csv
+from db import connect, get_db
+from passwords import DEFAULT_METHOD
+from security import check_rights
+from validators import validate_users
+
+bp = Blueprint("users_bulk", __name__, url_prefix="/users")
+
+BATCH_SIZE = 500
+FIELDS = ("login", "password", "last_name", "first_name", "middle_name", "role")
+# выгрузка в тех же колонках, что и загрузка (без пароля): её можно поправить и загрузить обратно
+EXPORT_FIELDS = ["login", "last_name", "first_name", "middle_name", "role", "created_at"]
+UNKNOWN_ROLE = "Неизвестная роль."
+LOGIN_TAKEN = "Логин уже занят."
+PARSE_ERROR = "Не удалось разобрать файл"
+
+
+# --- чтение файла: строки отдаются по одной, файл целиком в память не читается ---
+
+def read_csv(stream):
+    # разделитель «;», как в выгрузках csv_export, или «,»; BOM от Excel пропускаем
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    first = text.readline()
+    delimiter = ";" if first.count(";") >= first.count(",") else ","
+    header = [name.strip() for name in next(csv.reader([first], delimiter=delimiter), [])]
+    yield from csv.DictReader(text, fieldnames=header, delimiter=delimiter)
+
+
+def read_json(stream):
+    # JSON Lines (объект на строку) читается потоково; обычный JSON-массив
+    # стандартный json умеет разобрать только целиком
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig")
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("["):
+            yield from json.loads(line + text.read())
+            return
+        yield json.loads(line)
+
+
+def detect_format(filename: str | None, mimetype: str | None) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".json", ".jsonl", ".ndjson")) or (mimetype or "").endswith(("json", "ndjson")):
+        return "json"
+    return "csv"
+
+
+def read_rows(stream, fmt: str):
+    reader = read_json if fmt == "json" else read_csv
+    for row in reader(stream):
+        if not isinstance(row, dict):
+            row = {}
+        # как в форме создания: пароль не обрезаем, остальные поля — да
+        yield {
+            field: str(row.get(field) or "") if field == "password" else str(row.get(field) or "").strip()
+            for field in FIELDS
+        }
+
+
+# --- загрузка ---
+
+def batched(items, size: int):
+    it = iter(items)
+    while batch := list(itertools.islice(it, size)):
+        yield batch
+
+
+def parsed_rows(rows, report: dict):
+    # Ошибка разбора посреди файла останавливает чтение, но не загрузку: уже
+    # вставленные пачки и корректные строки до ошибки остаются, а сама ошибка
+    # попадает в отчёт под номером записи, которую не удалось прочитать.
+    try:
+        yield from rows
+    except (ValueError, csv.Error) as e:
+        report["errors"].append({"row": report["total"] + 1, "login": "", "errors": {"file": f"{PARSE_ERROR}: {e}"}})
+
+
+def checked_rows(rows, roles: dict, report: dict):
+    # Проверка validators.validate_users идёт вместе с чтением: tee держит
+    # не больше одной строки, т.к. обе ветки продвигаются синхронно.
+    rows, to_validate = itertools.tee(parsed_rows(rows, report))
+    for row, (number, errors) in zip(rows, validate_users(to_validate)):
+        report["total"] += 1
+        role_id = None
+        if row["role"]:
+            role_id = roles.get(row["role"])
+            if role_id is None:
+                errors["role"] = UNKNOWN_ROLE
+        if errors:
+            report["errors"].append({"row": number, "login": row["login"], "errors": errors})
+            continue
+        yield number, row, role_id
+
+
+INSERT_SQL = """
+    INSERT INTO users(login, password_hash, last_name, first_name, middle_name, role_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def insert_batch(conn, batch, hash_password, pool, workers: int, report: dict) -> None:
+    # занятые логины отсеиваем до хэширования — KDF для них не считаем
+    logins = [row["login"] for _, row, _ in batch]
+    placeholders = ",".join("?" * len(logins))
+    taken = {r[0] for r in conn.execute(f"SELECT login FROM users WHERE login IN ({placeholders})", logins)}
+    if taken:
+        for number, row, _ in batch:
+            if row["login"] in taken:
+                report["errors"].append({"row": number, "login": row["login"], "errors": {"login": LOGIN_TAKEN}})
+        batch = [item for item in batch if item[1]["login"] not in taken]
+        if not batch:
+            return
+
+    # хэши считаются параллельно в процессах: KDF упирается в CPU, а потоки — в GIL
+    chunksize = max(1, len(batch) // (workers * 4))
+    hashes = pool.map(hash_password, [row["password"] for _, row, _ in batch], chunksize=chunksize)
+    values = [
+        (number, (row["login"], password_hash, row["last_name"], row["first_name"], row["middle_name"] or None, role_id))
+        for (number, row, role_id), password_hash in zip(batch, hashes)
+    ]
+
+    try:
+        with conn:
+            conn.executemany(INSERT_SQL, [params for _, params in values])
+        report["created"] += len(values)
+        return
+    except sqlite3.IntegrityError:
+        pass
+
+    # логин заняли параллельно с загрузкой — вставляем пачку построчно, чтобы
+    # указать конкретные строки; транзакция по-прежнему одна на пачку
+    with conn:
+        for number, params in values:
+            try:
+                conn.execute(INSERT_SQL, params)
+            except sqlite3.IntegrityError:
+                report["errors"].append({"row": number, "login": params[0], "errors": {"login": LOGIN_TAKEN}})
+            else:
+                report["created"] += 1
+
+
+def import_users(conn, rows, pool, workers: int, method: str = DEFAULT_METHOD,
+                 batch_size: int = BATCH_SIZE) -> dict:
+    # Строки проверяются по мере чтения, корректные копятся в пачки по batch_size:
+    # пачка хэшируется в пуле процессов pool (workers — его размер) и
+    # вставляется одной транзакцией. Отчёт: сколько строк прочитано и создано,
+    # ошибки по номеру записи (с 1).
+    roles = {r["name"]: r["id"] for r in conn.execute("SELECT id, name FROM roles")}
+    report = {"total": 0, "created": 0, "errors": []}
+    hash_password = partial(generate_password_hash, method=method)
+    for batch in batched(checked_rows(rows, roles, report), batch_size):
+        insert_batch(conn, batch, hash_password, pool, workers, report)
+    report["errors"].sort(key=lambda e: e["row"])
+    return report
+
+
+# Пул процессов для загрузок через веб: один на приложение, размером
+# USER_IMPORT_WORKERS — одновременные загрузки делят его, а не заводят по
+# пулу на CPU каждая. Процессы стартуют через forkserver: fork из
+# многопоточного сервера унёс бы в них чужие блокировки и соединения SQLite.
+class ImportPool:
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.workers = app.config.get("USER_IMPORT_WORKERS", self.workers)
+        app.extensions["user_import_pool"] = self
+        atexit.register(self.shutdown)
+
+    def get(self) -> ProcessPoolExecutor:
+        # после fork воркера сервера пул родителя не используем — заводим свой
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("forkserver"),
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown()
+
+
+import_pool = ImportPool()
+
+
+# --- выгрузка ---
+
+def users_query(conn):
+    return conn.execute(
+        """
+        SELECT u.login, u.last_name, u.first_name, u.middle_name, r.name AS role, u.created_at
+        FROM users u
+        LEFT JOIN roles r ON r.id = u.role_id
+        ORDER BY u.id
+        """
+    )
+
+
+def export_row(r) -> list:
+    return [r[field] or "" for field in EXPORT_FIELDS]
+
+
+def iter_jsonl(query, fetch_size: int = FETCH_SIZE):
+    # как csv_export.iter_csv: запрос выполняется внутри генератора, в памяти одна пачка
+    cursor = query()
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        yield "".join(json.dumps(dict(r), ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+
+
+# --- маршруты ---
+
+@bp.route("/import", methods=["GET", "POST"])
+@login_required
+@check_rights("users.import")
+def users_import():
+    if request.method == "GET":
+        return render_template("users_import.html", report=None)
+
+    options = {
+        "pool": import_pool.get(),
+        "workers": import_pool.workers,
+        "method": current_app.config.get("PASSWORD_HASH_METHOD", DEFAULT_METHOD),
+        "batch_size": current_app.config.get("USER_IMPORT_BATCH_SIZE", BATCH_SIZE),
+    }
+
+    upload = request.files.get("file")
+    if upload is None:
+        # API: файл в теле запроса (text/csv, application/json, application/x-ndjson), ответ — JSON
+        fmt = request.args.get("format") or detect_format(None, request.mimetype)
+        return jsonify(import_users(get_db(), read_rows(request.stream, fmt), **options))
+
+    if not upload.filename:
+        flash("Выберите файл для загрузки.", "danger")
+        return render_template("users_import.html", report=None)
+    fmt = detect_format(upload.filename, upload.mimetype)
+    report = import_users(get_db(), read_rows(upload.stream, fmt), **options)
+    flash(f"Создано пользователей: {report['created']} из {report['total']}.",
+          "danger" if report["errors"] else "success")
+    return render_template("users_import.html", report=report)
+
+
+@bp.get("/export")
+@login_required
+@check_rights("users.export")
+def users_export():
+    if request.args.get("format") == "json":
+        return Response(
+            stream_with_context(iter_jsonl(lambda: users_query(get_db()))),
+            mimetype="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=users.jsonl"},
+        )
+    return csv_response(
+        lambda: users_query(get_db()),
+        EXPORT_FIELDS,
+        export_row,
+        "users.csv",
+    )
+
+
+# --- командная строка ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Массовая загрузка и выгрузка пользователей lab5 (CSV / JSON)")
+    parser.add_argument("--db", default=init_db.DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="загрузить пользователей из файла")
+    p_import.add_argument("file", help="CSV, JSON или JSON Lines; «-» — stdin")
+    p_import.add_argument("--format", choices=["csv", "json"], help="по умолчанию — по расширению файла")
+    p_import.add_argument("--method", default=DEFAULT_METHOD, help="метод хэширования werkzeug")
+    p_import.add_argument("--workers", type=int, default=None, help="процессов для хэширования (по умолчанию — число CPU)")
+    p_import.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    p_export = sub.add_parser("export", help="выгрузить пользователей с ролями")
+    p_export.add_argument("file", help="«-» — stdout")
+    p_export.add_argument("--format", choices=["csv", "json"], help="по умолчанию — по расширению файла")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        if args.command == "import":
+            fmt = args.format or detect_format(args.file, None)
+            stream = sys.stdin.buffer if args.file == "-" else open(args.file, "rb")
+            started = time.perf_counter()
+            # у командной строки свой пул на весь CPU: она однопоточная, fork безопасен
+            workers = args.workers or os.cpu_count() or 1
+            with stream, ProcessPoolExecutor(max_workers=workers) as pool:
+                report = import_users(conn, read_rows(stream, fmt), pool, workers, args.method, args.batch_size)
+            for error in report["errors"]:
+                print(f"запись {error['row']} ({error['login'] or '—'}): " + "; ".join(error["errors"].values()),
+                      file=sys.stderr)
+            print(f"Прочитано: {report['total']}, создано: {report['created']}, "
+                  f"с ошибками: {len(report['errors'])} за {time.perf_counter() - started:.1f} с")
+            sys.exit(1 if report["errors"] else 0)
+
+        fmt = args.format or detect_format(args.file, None)
+        query = partial(users_query, conn)
+        chunks = iter_jsonl(query) if fmt == "json" else iter_csv(query, EXPORT_FIELDS, export_row)
+        out = sys.stdout.buffer if args.file == "-" else open(args.file, "wb")
+        with out:
+            for chunk in chunks:
+                out.write(chunk)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
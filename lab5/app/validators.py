@@ -0,0 +1,118 @@
+import re
+
+REQUIRED = "Поле не может быть пустым."
+LOGIN_RE = re.compile(r"[A-Za-z0-9]{5,}")
+LOGIN_MESSAGE = "Логин должен быть не короче 5 символов и содержать только латинские буквы и цифры."
+DUPLICATE_LOGIN = "Логин повторяется в загружаемых данных."
+
+PASSWORD_MIN = 8
+PASSWORD_MAX = 128
+PASSWORD_MESSAGES = {
+    "short": "Пароль должен быть не менее 8 символов.",
+    "long": "Пароль должен быть не более 128 символов.",
+    "space": "Пароль не должен содержать пробелы.",
+    "invalid": "Пароль содержит недопустимые символы.",
+    "upper": "Пароль должен содержать хотя бы одну заглавную букву.",
+    "lower": "Пароль должен содержать хотя бы одну строчную букву.",
+    "digit": "Пароль должен содержать хотя бы одну цифру.",
+}
+
+# Классы символов пароля — множества, чтобы каждый символ классифицировать один раз
+UPPER = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZЁ" + "".join(map(chr, range(ord("А"), ord("Я") + 1))))
+LOWER = frozenset("abcdefghijklmnopqrstuvwxyzё" + "".join(map(chr, range(ord("а"), ord("я") + 1))))
+DIGITS = frozenset("0123456789")
+ALLOWED = UPPER | LOWER | DIGITS | frozenset("~!?@#$%^&*_-+()[]{}></\\|\"'.,:;")
+# быстрый путь: корректный пароль целиком проверяется одним скомпилированным
+# fullmatch; подробный разбор ошибок нужен только для отклонённых
+VALID_PASSWORD_RE = re.compile(
+    r"(?=[^A-ZА-ЯЁ]*[A-ZА-ЯЁ])(?=[^a-zа-яё]*[a-zа-яё])(?=[^0-9]*[0-9])"
+    r"[A-Za-zА-Яа-яЁё0-9~!?@#$%^&*_\-+()\[\]{}></\\|\"'.,:;]"
+    + f"{{{PASSWORD_MIN},{PASSWORD_MAX}}}"
+)
+
+
+def validate_required(value: str) -> str | None:
+    if not value:
+        return REQUIRED
+    return None
+
+
+def validate_login(login: str) -> str | None:
+    if not login:
+        return REQUIRED
+    if not LOGIN_RE.fullmatch(login):
+        return LOGIN_MESSAGE
+    return None
+
+
+def validate_password(pwd: str) -> list[str]:
+    if VALID_PASSWORD_RE.fullmatch(pwd):
+        return []
+    if not pwd:
+        return [REQUIRED]
+
+    errors: list[str] = []
+    if len(pwd) < PASSWORD_MIN:
+        errors.append(PASSWORD_MESSAGES["short"])
+    if len(pwd) > PASSWORD_MAX:
+        errors.append(PASSWORD_MESSAGES["long"])
+
+    chars = set(pwd)
+    if not chars <= ALLOWED:
+        if any(ch.isspace() for ch in chars - ALLOWED):
+            errors.append(PASSWORD_MESSAGES["space"])
+        errors.append(PASSWORD_MESSAGES["invalid"])
+    if UPPER.isdisjoint(chars):
+        errors.append(PASSWORD_MESSAGES["upper"])
+    if LOWER.isdisjoint(chars):
+        errors.append(PASSWORD_MESSAGES["lower"])
+    if DIGITS.isdisjoint(chars):
+        errors.append(PASSWORD_MESSAGES["digit"])
+    return errors
+
+
+def _first_password_error(pwd: str) -> str | None:
+    errors = validate_password(pwd)
+    return errors[0] if errors else None
+
+
+# поле формы -> проверка, возвращающая первую ошибку или None
+FIELD_VALIDATORS = {
+    "login": validate_login,
+    "password": _first_password_error,
+    "last_name": validate_required,
+    "first_name": validate_required,
+}
+USER_FIELDS = tuple(FIELD_VALIDATORS)
+
+
+def validate_user(form: dict, fields=USER_FIELDS) -> dict[str, str]:
+    # ошибки формы пользователя в виде {поле: сообщение}, как их показывают шаблоны
+    errors = {}
+    for field in fields:
+        error = FIELD_VALIDATORS[field](form.get(field) or "")
+        if error:
+            errors[field] = error
+    return errors
+
+
+def validate_users(rows, fields=USER_FIELDS):
+    # Пакетная проверка (импорт): отдаёт (номер строки, ошибки) для каждой
+    # строки; повтор логина внутри пакета тоже ошибка. rows может быть
+    # генератором — строки не накапливаются.
+    seen_logins = set()
+    check_login = "login" in fields
+    validators = [(field, FIELD_VALIDATORS[field]) for field in fields]
+    for number, row in enumerate(rows, start=1):
+        errors = {}
+        for field, validate in validators:
+            error = validate(row.get(field) or "")
+            if error:
+                errors[field] = error
+        if check_login and "login" not in errors:
+            login = row["login"]
+            if login in seen_logins:
+                errors["login"] = DUPLICATE_LOGIN
+            else:
+                seen_logins.add(login)
+        yield number, errors
@@ -0,0 +1,115 @@
+import atexit
+import queue
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from db import connect, DEFAULT_PRAGMAS, pragmas_from_config
+from visit_stats import apply_visits
+
+INSERT_SQL = "INSERT INTO visit_logs(path, user_id, created_at) VALUES (?, ?, ?)"
+
+
+# Буферизованная запись журнала посещений: запрос только кладёт запись
+# в ограниченную очередь, а фоновый поток забирает её пачками и пишет
+# через executemany одной транзакцией на пачку (вместе с агрегатами visit_stats).
+class VisitLogWriter:
+    def __init__(self, db_path=None, flush_interval=1.0, batch_size=500, queue_size=10000):
+        self.db_path = db_path
+        self.pragmas = DEFAULT_PRAGMAS
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.written = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.db_path = app.config["DB_PATH"]
+        self.pragmas = pragmas_from_config(app.config)
+        self.flush_interval = app.config.get("VISIT_LOG_FLUSH_INTERVAL", self.flush_interval)
+        self.batch_size = app.config.get("VISIT_LOG_BATCH_SIZE", self.batch_size)
+        self.queue = queue.Queue(maxsize=app.config.get("VISIT_LOG_QUEUE_SIZE", self.queue.maxsize))
+        app.extensions["visit_log"] = self
+        atexit.register(self.stop)
+
+    def record(self, path: str, user_id: int | None) -> bool:
+        # created_at фиксируем в момент запроса, а не в момент записи пачки
+        created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((path, user_id, created_at))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def flush(self) -> int:
+        total = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return total
+            self._write(batch)
+            total += len(batch)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        # дописываем то, что осталось в очереди
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="visit-log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._stop.wait(self.flush_interval)
+            self.flush()
+
+    def _take_batch(self) -> list[tuple]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list[tuple]) -> None:
+        conn = connect(self.db_path, self.pragmas)
+        try:
+            with conn:
+                conn.executemany(INSERT_SQL, batch)
+                apply_visits(conn, batch)
+        except sqlite3.Error:
+            # если БД еще не инициализирована — записи теряются, как и раньше
+            with self._lock:
+                self.dropped += len(batch)
+            return
+        finally:
+            conn.close()
+        with self._lock:
+            self.written += len(batch)
+
+
+visit_writer = VisitLogWriter()
@@ -0,0 +1,83 @@
+import os
+import sqlite3
+from collections import Counter
+
+BASE_DIR = os.path.dirname(__file__)
+DB_PATH = os.path.join(BASE_DIR, "app.db")
+
+UPSERT_SQL = """
+    INSERT INTO visit_stats(day, path, user_id, visits)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(day, path, IFNULL(user_id, 0))
+    DO UPDATE SET visits = visits + excluded.visits
+"""
+
+PATH_TOTALS_SQL = """
+    INSERT INTO visit_path_totals(path, visits) VALUES (?, ?)
+    ON CONFLICT(path) DO UPDATE SET visits = visits + excluded.visits
+"""
+
+USER_TOTALS_SQL = """
+    INSERT INTO visit_user_totals(user_id, visits) VALUES (?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET visits = visits + excluded.visits
+"""
+
+TOTAL_SQL = """
+    INSERT INTO visit_totals(id, visits) VALUES (1, ?)
+    ON CONFLICT(id) DO UPDATE SET visits = visits + excluded.visits
+"""
+
+BACKFILL_SQL = """
+    INSERT INTO visit_stats(day, path, user_id, visits)
+    SELECT date(created_at), path, user_id, COUNT(*)
+    FROM visit_logs
+    GROUP BY date(created_at), path, user_id
+"""
+
+BACKFILL_TOTALS_SQL = [
+    "INSERT INTO visit_path_totals(path, visits) SELECT path, SUM(visits) FROM visit_stats GROUP BY path",
+    """
+    INSERT INTO visit_user_totals(user_id, visits)
+    SELECT IFNULL(user_id, 0), SUM(visits) FROM visit_stats GROUP BY IFNULL(user_id, 0)
+    """,
+    "INSERT INTO visit_totals(id, visits) SELECT 1, COALESCE(SUM(visits), 0) FROM visit_path_totals",
+]
+
+
+def apply_visits(conn, batch) -> None:
+    # batch — строки (path, user_id, created_at), как их пишет VisitLogWriter;
+    # сворачиваем пачку заранее, чтобы на каждый ключ был один upsert
+    counts = Counter((created_at[:10], path, user_id) for path, user_id, created_at in batch)
+    conn.executemany(UPSERT_SQL, [(day, path, user_id, c) for (day, path, user_id), c in counts.items()])
+
+    path_totals = Counter()
+    user_totals = Counter()
+    for (_, path, user_id), c in counts.items():
+        path_totals[path] += c
+        user_totals[user_id or 0] += c
+    conn.executemany(PATH_TOTALS_SQL, list(path_totals.items()))
+    conn.executemany(USER_TOTALS_SQL, list(user_totals.items()))
+    conn.execute(TOTAL_SQL, (len(batch),))
+
+
+def backfill(conn) -> int:
+    with conn:
+        for table in ("visit_stats", "visit_path_totals", "visit_user_totals", "visit_totals"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute(BACKFILL_SQL)
+        for sql in BACKFILL_TOTALS_SQL:
+            conn.execute(sql)
+    return conn.execute("SELECT visits FROM visit_totals WHERE id = 1").fetchone()[0]
+
+
+def main():
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        total = backfill(conn)
+    finally:
+        conn.close()
+    print("Агрегаты журнала пересчитаны, посещений:", total)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
-from flask import Flask, render_template, send_from_directory
+from flask import Flask, render_template
 from flask_migrate import Migrate
 from sqlalchemy.exc import SQLAlchemyError
 from models import db, Category, Image
 from auth import bp as auth_bp, init_login_manager
 from courses import bp as courses_bp
+from images import send_image, generate_variants
+from static_assets import init_static
+from passwords import hasher
+from profiling import profiler, request_db_time
+from metrics import metrics
+from gen_data import gen_data_command
 
 app = Flask(__name__)
 application = app
@@ -14,6 +20,10 @@ db.init_app(app)
 migrate = Migrate(app, db)
 
 init_login_manager(app)
+init_static(app)
+hasher.init_app(app)
+profiler.init_app(app)
+metrics.init_app(app, db_time=request_db_time)
 
 @app.errorhandler(SQLAlchemyError)
 def handle_sqlalchemy_error(err):
@@ -23,6 +33,7 @@ def handle_sqlalchemy_error(err):
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(courses_bp)
+app.cli.add_command(gen_data_command)
 
 @app.route('/')
 def index():
@@ -32,8 +43,15 @@ def index():
         categories=categories,
     )
 
+@app.cli.command('image-variants')
+def image_variants_command():
+    """Создать уменьшенные копии для всех загруженных изображений."""
+    created = 0
+    for img in db.session.execute(db.select(Image)).scalars():
+        created += generate_variants(app.config['UPLOAD_FOLDER'],
+                                     img.storage_filename, img.md5_hash)
+    print(f'Создано файлов: {created}')
+
 @app.route('/images/<image_id>')
 def image(image_id):
-    img = db.get_or_404(Image, image_id)
-    return send_from_directory(app.config['UPLOAD_FOLDER'],
-                               img.storage_filename)
+    return send_image(image_id)
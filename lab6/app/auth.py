@@ -1,6 +1,10 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import LoginManager, login_user, logout_user, login_required
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
 from models import db, User
+from passwords import hasher, HashingBusy
+from user_cache import user_cache
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -11,11 +15,37 @@ def init_login_manager(app):
     login_manager.login_message_category = 'warning'
     login_manager.user_loader(load_user)
     login_manager.init_app(app)
+    user_cache.init_app(app)
 
 def load_user(user_id):
+    # в установившемся режиме пользователь собирается из кэша и присоединяется
+    # к сессии через merge(load=False) — без SELECT к users
+    values = user_cache.get(user_id)
+    if values is not None:
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
     user = db.session.execute(db.select(User).filter_by(id=user_id)).scalar()
+    if user is not None:
+        user_cache.put(user_id, {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs})
     return user
 
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, user):
+    # любое изменение пользователя через ORM (смена пароля, удаление) сбрасывает кэш
+    user_cache.invalidate(user.id)
+
+def rehash_password(user, password):
+    # параметры хэширования изменились — пересчитываем хэш при успешном входе
+    if not hasher.needs_rehash(user.password_hash):
+        return
+    try:
+        user.set_password(password)
+    except HashingBusy:
+        return
+    db.session.commit()
+
 @bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
@@ -23,7 +53,13 @@ def login():
         password = request.form.get('password')
         if login and password:
             user = db.session.execute(db.select(User).filter_by(login=login)).scalar()
-            if user and user.check_password(password):
+            try:
+                ok = user is not None and user.check_password(password)
+            except HashingBusy:
+                flash('Сервер перегружен, повторите попытку через несколько секунд.', 'warning')
+                return render_template('auth/login.html'), 503
+            if ok:
+                rehash_password(user, password)
                 login_user(user)
                 flash('Вы успешно аутентифицированы.', 'success')
                 next = request.args.get('next')
@@ -0,0 +1,82 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+# бенчмарк работает на отдельной временной БД, её надо задать до импорта app
+TMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TMP_DIR, 'bench.db').replace('\\', '/')
+
+from flask_migrate import upgrade  # noqa: E402
+from app import app  # noqa: E402
+import gen_data  # noqa: E402
+import loadtest  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from models import db, Review  # noqa: E402
+from tools import QueryCounter  # noqa: E402
+
+# число SQL-запросов каталога и отзывов не должно зависеть от размера страницы (N+1)
+QUERY_CHECK_SIZES = (5, 50)
+
+
+def check_query_counts():
+    with app.app_context():
+        # отзывы курса, у которого их больше всего, — обе страницы заполнены целиком
+        course_id = db.session.scalar(
+            select(Review.course_id).group_by(Review.course_id).order_by(func.count().desc()).limit(1))
+    client = app.test_client()
+    failures = []
+    for path in ['/courses/?per_page={}', f'/courses/{course_id}/reviews?per_page={{}}']:
+        client.get(path.format(QUERY_CHECK_SIZES[0]))  # прогрев
+        counts = []
+        for per_page in QUERY_CHECK_SIZES:
+            with app.app_context(), QueryCounter() as counter:
+                client.get(path.format(per_page))
+            counts.append(counter.count)
+        print(f'{path.format("N")}: запросов {dict(zip(QUERY_CHECK_SIZES, counts))}', file=sys.stderr)
+        if len(set(counts)) > 1:
+            failures.append(path)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный прогон основных маршрутов lab6')
+    parser.add_argument('--courses', type=int, default=5000)
+    parser.add_argument('--reviews', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--skew', type=float, default=1.1, help='показатель Ципфа для отзывов по курсам')
+    loadtest.add_arguments(parser)
+    args = parser.parse_args()
+
+    app.config['UPLOAD_FOLDER'] = os.path.join(TMP_DIR, 'images')
+    os.makedirs(app.config['UPLOAD_FOLDER'])
+    with app.app_context():
+        upgrade(directory=os.path.join(os.path.dirname(__file__), 'migrations'))
+        gen_data.generate(args.users, args.courses, args.reviews, args.skew, args.vocabulary)
+
+    failures = check_query_counts()
+    if failures:
+        print('Число запросов растёт с размером страницы (N+1): ' + ', '.join(failures), file=sys.stderr)
+        sys.exit(1)
+
+    # поисковые запросы — префиксы слов того же словаря, что и у курсов
+    random.seed(42)
+    terms = [w[:4] for w in random.sample(gen_data.make_words(args.vocabulary), 20)]
+    course_ids = list(range(1, args.courses + 1))
+
+    scenarios = {
+        'courses_search': lambda c: c.get(f'/courses/?name={random.choice(terms)}'),
+        'course_reviews': lambda c: c.get(f'/courses/{random.choice(course_ids)}/reviews'),
+        'image': lambda c: c.get(f'/images/{gen_data.IMAGE_ID}'),
+    }
+    routes = loadtest.run_routes(app, scenarios, args)
+
+    config = {'mode': args.mode, 'clients': args.clients, 'courses': args.courses,
+              'reviews': args.reviews, 'users': args.users}
+    sys.exit(loadtest.report('lab6', config, routes, args.baseline, args.save_baseline, args.tolerance))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+# бенчмарк работает на отдельной временной БД, её надо задать до импорта app
+TMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TMP_DIR, 'bench.db').replace('\\', '/')
+
+from flask_migrate import upgrade  # noqa: E402
+from app import app  # noqa: E402
+from gen_data import make_words, sentence  # noqa: E402
+from models import db, Course, User, Image  # noqa: E402
+from tools import CoursesFilter  # noqa: E402
+
+
+def seed(courses, words):
+    db.session.add(User(id=1, first_name='Bench', last_name='Bench', login='bench', password_hash='-'))
+    db.session.add(Image(id='bench', file_name='bench.jpg', mime_type='image/jpeg', md5_hash='bench'))
+    db.session.flush()
+    db.session.execute(db.insert(Course), [
+        {
+            'name': sentence(words, 3),
+            'short_desc': sentence(words, 20),
+            'full_desc': sentence(words, 200),
+            'rating_sum': 0,
+            'rating_num': 0,
+            'category_id': random.randint(1, 3),
+            'author_id': 1,
+            'background_image_id': 'bench',
+        }
+        for _ in range(courses)
+    ])
+    db.session.commit()
+
+
+def measure(terms, full_text, repeat):
+    started = time.perf_counter()
+    found = 0
+    for _ in range(repeat):
+        for term in terms:
+            stmt = CoursesFilter(name=term, category_ids=[], full_text=full_text).perform()
+            found += len(db.session.scalars(stmt.limit(10)).all())
+    elapsed = time.perf_counter() - started
+    return elapsed / (repeat * len(terms)) * 1000, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Поиск курсов: ILIKE против FTS5')
+    parser.add_argument('--courses', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    args = parser.parse_args()
+
+    app.config['SQLALCHEMY_ECHO'] = False
+    random.seed(42)
+    words = make_words(args.vocabulary)
+    # часть запросов — префиксы слов, как при вводе в строку поиска
+    terms = [w[:4] for w in random.sample(words, 10)] + random.sample(words, 10)
+
+    with app.app_context():
+        db.engine.echo = False
+        upgrade(directory=os.path.join(os.path.dirname(__file__), 'migrations'))
+        seed(args.courses, words)
+
+        for full_text, label in ((False, 'ILIKE'), (True, 'FTS5')):
+            ms, found = measure(terms, full_text, args.repeat)
+            print(f'{label:>6}: {ms:8.2f} мс на запрос (найдено {found})')
+
+
+if __name__ == '__main__':
+    main()
@@ -7,9 +7,42 @@ DB_PATH = os.path.join(BASE_DIR, 'instance', 'project.db')
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
 # ВАЖНО: для SQLite на Windows используем прямые слэши
-SQLALCHEMY_DATABASE_URI = 'sqlite:///' + DB_PATH.replace('\\', '/')
+# DATABASE_URL позволяет подставить другую БД (например, для бенчмарков)
+SQLALCHEMY_DATABASE_URI = os.environ.get(
+    'DATABASE_URL', 'sqlite:///' + DB_PATH.replace('\\', '/'))
 
 SQLALCHEMY_TRACK_MODIFICATIONS = False
-SQLALCHEMY_ECHO = True
+SQLALCHEMY_ECHO = False
 
-UPLOAD_FOLDER = os.path.join(BASE_DIR, 'media', 'images')
\ No newline at end of file
+# профилирование SQL (profiling.py): порог медленного запроса в секундах,
+# сколько самых медленных запросов хранить и сколько разных запросов
+# учитывать в сводке; /_debug/queries доступна в debug или при SQL_PROFILING_ENDPOINT
+SQL_PROFILING = True
+SQL_SLOW_QUERY_THRESHOLD = 0.1
+SQL_PROFILING_TOP = 5
+SQL_PROFILING_MAX_STATEMENTS = 200
+SQL_PROFILING_ENDPOINT = False
+
+UPLOAD_FOLDER = os.path.join(BASE_DIR, 'media', 'images')
+
+# максимальный размер загружаемого изображения, байт
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+# предел всего тела запроса (изображение + поля формы): больший запрос
+# отклоняется с 413 до разбора multipart, не попадая во временный файл werkzeug
+MAX_CONTENT_LENGTH = MAX_IMAGE_SIZE + 1024 * 1024
+
+# отдача изображений: размер LRU id -> файл и, при наличии nginx,
+# префикс internal location для X-Accel-Redirect (например '/protected-images/')
+IMAGE_CACHE_SIZE = 4096
+IMAGE_ACCEL_REDIRECT_PREFIX = None
+# потоки фонового пула, создающего уменьшенные копии изображений
+IMAGE_VARIANT_WORKERS = 2
+
+# хэширование паролей: метод/стоимость werkzeug и ограничение параллельности
+PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+PASSWORD_HASH_WORKERS = 2
+PASSWORD_HASH_MAX_PENDING = 16
+
+# кэш пользователей для user_loader: срок жизни записи, секунд, и размер
+USER_CACHE_TTL = 30.0
+USER_CACHE_SIZE = 10000
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
-from flask import Blueprint, render_template, request, flash, redirect, url_for, abort
+from flask import Blueprint, current_app, render_template, request, flash, redirect, url_for
 from flask_login import login_required, current_user
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
+from werkzeug.exceptions import RequestEntityTooLarge
 
 from models import db, Course, Category, User, Review
-from tools import CoursesFilter, ImageSaver
+from tools import CoursesFilter, ImageSaver, ImageTooLarge
 
 bp = Blueprint('courses', __name__, url_prefix='/courses')
 
@@ -27,20 +28,51 @@ def search_params():
     }
 
 
-def _recalc_course_rating(course_id: int) -> None:
-    rating_sum, rating_num = db.session.execute(
-        select(
-            func.coalesce(func.sum(Review.rating), 0),
-            func.count(Review.id),
-        ).where(Review.course_id == course_id)
-    ).one()
+def _change_course_rating(course_id: int, rating_delta: int, num_delta: int) -> None:
+    # Атомарный UPDATE вместо пересчёта SUM/COUNT по всем отзывам:
+    # добавление отзыва — (rating, 1), удаление — (-rating, -1),
+    # изменение оценки — (new - old, 0).
+    db.session.execute(
+        update(Course)
+        .where(Course.id == course_id)
+        .values(
+            rating_sum=Course.rating_sum + rating_delta,
+            rating_num=Course.rating_num + num_delta,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reconcile_ratings() -> int:
+    # Пересчёт денормализованных rating_sum/rating_num по отзывам
+    # одним GROUP BY; исправляются только разошедшиеся курсы.
+    totals = {
+        course_id: (int(rating_sum), int(rating_num))
+        for course_id, rating_sum, rating_num in db.session.execute(
+            select(Review.course_id, func.sum(Review.rating), func.count(Review.id))
+            .group_by(Review.course_id)
+        )
+    }
 
-    course = db.session.get(Course, course_id)
-    if course is None:
-        abort(404)
+    fixes = []
+    for course_id, rating_sum, rating_num in db.session.execute(
+        select(Course.id, Course.rating_sum, Course.rating_num)
+    ):
+        expected = totals.get(course_id, (0, 0))
+        if (rating_sum, rating_num) != expected:
+            fixes.append({'id': course_id, 'rating_sum': expected[0], 'rating_num': expected[1]})
 
-    course.rating_sum = int(rating_sum or 0)
-    course.rating_num = int(rating_num or 0)
+    if fixes:
+        db.session.execute(update(Course), fixes)
+    db.session.commit()
+    return len(fixes)
+
+
+@bp.cli.command('reconcile-ratings')
+def reconcile_ratings_command():
+    """Пересчитать рейтинги курсов по отзывам (для запуска по расписанию)."""
+    fixed = reconcile_ratings()
+    print(f'Исправлено курсов: {fixed}')
 
 
 def _get_my_review(course_id: int):
@@ -86,10 +118,11 @@ def new():
 @bp.route('/create', methods=['POST'])
 @login_required
 def create():
-    f = request.files.get('background_img')
     img = None
     course = Course()
+    status = 200
     try:
+        f = request.files.get('background_img')
         if f and f.filename:
             img = ImageSaver(f).save()
 
@@ -97,11 +130,18 @@ def create():
         course = Course(**params(), background_image_id=image_id)
         db.session.add(course)
         db.session.commit()
-    except IntegrityError as err:
-        flash(
-            f'Возникла ошибка при записи данных в БД. Проверьте корректность введённых данных. ({err})',
-            'danger',
-        )
+    except (IntegrityError, ImageTooLarge, RequestEntityTooLarge) as err:
+        if isinstance(err, RequestEntityTooLarge):
+            # тело больше MAX_CONTENT_LENGTH: отклонено до разбора формы
+            flash(str(ImageTooLarge(current_app.config['MAX_IMAGE_SIZE'])), 'danger')
+            status = 413
+        elif isinstance(err, ImageTooLarge):
+            flash(str(err), 'danger')
+        else:
+            flash(
+                f'Возникла ошибка при записи данных в БД. Проверьте корректность введённых данных. ({err})',
+                'danger',
+            )
         db.session.rollback()
         categories = db.session.execute(db.select(Category)).scalars()
         users = db.session.execute(db.select(User)).scalars()
@@ -110,7 +150,7 @@ def create():
             categories=categories,
             users=users,
             course=course,
-        )
+        ), status
 
     flash(f'Курс {course.name} был успешно добавлен!', 'success')
     return redirect(url_for('courses.index'))
@@ -221,7 +261,7 @@ def create_review(course_id: int):
 
     try:
         db.session.add(review)
-        _recalc_course_rating(course_id)
+        _change_course_rating(course_id, rating, 1)
         db.session.commit()
     except IntegrityError as err:
         db.session.rollback()
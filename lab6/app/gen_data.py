@@ -0,0 +1,142 @@
+import hashlib
+import itertools
+import os
+import random
+import time
+
+import click
+from flask import current_app
+from sqlalchemy import func, select
+
+from models import db, Category, Course, Image, Review, User
+from passwords import hasher
+
+BATCH_SIZE = 20000
+LETTERS = 'абвгдежзиклмнопрстуфхцчшэюя'
+LAST_NAMES = ['Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов']
+FIRST_NAMES = ['Александр', 'Дмитрий', 'Максим', 'Сергей', 'Андрей', 'Алексей', 'Артём', 'Илья']
+# 1x1 PNG — общая обложка сгенерированных курсов
+PIXEL = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082')
+IMAGE_ID = 'generated'
+
+
+def make_words(n):
+    return [''.join(random.choice(LETTERS) for _ in range(random.randint(4, 10))) for _ in range(n)]
+
+
+def sentence(words, n):
+    return ' '.join(random.choices(words, k=n))
+
+
+def zipf_cum_weights(n, skew):
+    # вес k-го элемента ~ 1 / k^skew; skew=0 — равномерное распределение
+    return list(itertools.accumulate(1 / k ** skew for k in range(1, n + 1)))
+
+
+def insert_batched(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(db.insert(model), rows[start:start + BATCH_SIZE])
+
+
+def ensure_image():
+    if db.session.get(Image, IMAGE_ID) is None:
+        db.session.add(Image(id=IMAGE_ID, file_name='generated.png', mime_type='image/png',
+                             md5_hash=hashlib.md5(PIXEL).hexdigest()))
+    path = os.path.join(current_app.config['UPLOAD_FOLDER'], IMAGE_ID + '.png')
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(PIXEL)
+
+
+def generate_users(count, password):
+    # один хэш на всех: считать KDF десятки тысяч раз незачем
+    password_hash = hasher.hash(password)
+    start = db.session.scalar(select(func.coalesce(func.max(User.id), 0))) + 1
+    insert_batched(User, [
+        {
+            'first_name': random.choice(FIRST_NAMES),
+            'last_name': random.choice(LAST_NAMES),
+            'login': f'gen{i:07d}',
+            'password_hash': password_hash,
+        }
+        for i in range(start, start + count)
+    ])
+    return list(range(start, start + count))
+
+
+def generate_courses(count, author_ids, words):
+    category_ids = db.session.scalars(select(Category.id)).all()
+    start = db.session.scalar(select(func.coalesce(func.max(Course.id), 0))) + 1
+    insert_batched(Course, [
+        {
+            'name': sentence(words, 3),
+            'short_desc': sentence(words, 20),
+            'full_desc': sentence(words, 200),
+            'rating_sum': 0,
+            'rating_num': 0,
+            'category_id': random.choice(category_ids),
+            'author_id': random.choice(author_ids),
+            'background_image_id': IMAGE_ID,
+        }
+        for _ in range(count)
+    ])
+    return list(range(start, start + count))
+
+
+def generate_reviews(count, course_ids, user_ids, skew, words):
+    # «горячие» курсы собирают большую часть отзывов (Ципф по курсам);
+    # один пользователь оставляет не больше одного отзыва на курс
+    hot = course_ids[:]
+    random.shuffle(hot)
+    weights = zipf_cum_weights(len(hot), skew)
+    seen = set()
+    rows = []
+    for _ in range(3):
+        need = count - len(rows)
+        if need <= 0:
+            break
+        for course_id, user_id in zip(random.choices(hot, cum_weights=weights, k=need),
+                                      random.choices(user_ids, k=need)):
+            if (course_id, user_id) not in seen:
+                seen.add((course_id, user_id))
+                rows.append({
+                    'rating': random.randint(0, 5),
+                    'text': sentence(words, random.randint(5, 40)),
+                    'course_id': course_id,
+                    'user_id': user_id,
+                })
+    insert_batched(Review, rows)
+    return len(rows)
+
+
+def generate(users, courses, reviews, skew=1.1, vocabulary=20000, password='Password123', seed=42):
+    # всё в одной транзакции; рейтинги курсов затем считаются одним GROUP BY
+    from courses import reconcile_ratings
+
+    random.seed(seed)
+    words = make_words(vocabulary)
+    ensure_image()
+    user_ids = generate_users(users, password)
+    course_ids = generate_courses(courses, user_ids, words)
+    created = generate_reviews(reviews, course_ids, user_ids, skew, words)
+    db.session.commit()
+    reconcile_ratings()
+    return created
+
+
+@click.command('gen-data')
+@click.option('--users', default=10000, help='Число пользователей.')
+@click.option('--courses', default=20000, help='Число курсов.')
+@click.option('--reviews', default=200000, help='Число отзывов.')
+@click.option('--skew', default=1.1, help='Показатель Ципфа: насколько отзывы сосредоточены на популярных курсах.')
+@click.option('--password', default='Password123', help='Пароль всех созданных пользователей.')
+@click.option('--seed', default=42)
+def gen_data_command(users, courses, reviews, skew, password, seed):
+    """Заполнить БД синтетическими пользователями, курсами и отзывами."""
+    started = time.perf_counter()
+    created = generate(users, courses, reviews, skew, password=password, seed=seed)
+    print(f'Создано пользователей: {users}, курсов: {courses}, отзывов: {created} '
+          f'за {time.perf_counter() - started:.1f} с')
@@ -0,0 +1,202 @@
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, request, send_from_directory, abort, Response
+from models import db, Image
+
+try:
+    from PIL import Image as PILImage, ImageOps
+except ImportError:  # без Pillow варианты не создаются, отдаётся оригинал
+    PILImage = None
+
+logger = logging.getLogger(__name__)
+
+# содержимое изображения под данным id никогда не меняется
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# вариант ещё не готов и вместо него отдан оригинал: кэшировать под адресом
+# варианта нельзя, иначе оригинал останется там и после создания варианта
+FALLBACK_CACHE_CONTROL = 'no-cache'
+
+# уменьшенные копии: имя -> максимальная сторона, px
+VARIANTS = {
+    'thumb': 320,
+    'card': 640,
+    'full': 1920,
+}
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+class ImageIndex:
+    # LRU id -> (storage_filename, md5_hash, mime_type), чтобы повторные
+    # запросы картинки не ходили в БД
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, image_id):
+        with self._lock:
+            entry = self._items.get(image_id)
+            if entry is not None:
+                self._items.move_to_end(image_id)
+            return entry
+
+    def put(self, image_id, entry):
+        with self._lock:
+            self._items[image_id] = entry
+            self._items.move_to_end(image_id)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, image_id=None):
+        with self._lock:
+            if image_id is None:
+                self._items.clear()
+            else:
+                self._items.pop(image_id, None)
+
+
+def get_index():
+    index = current_app.extensions.get('image_index')
+    if index is None:
+        index = ImageIndex(current_app.config.get('IMAGE_CACHE_SIZE', 4096))
+        current_app.extensions['image_index'] = index
+    return index
+
+
+def lookup(image_id):
+    index = get_index()
+    entry = index.get(image_id)
+    if entry is None:
+        img = db.session.get(Image, image_id)
+        if img is None:
+            abort(404)
+        entry = (img.storage_filename, img.md5_hash, img.mime_type)
+        index.put(image_id, entry)
+    return entry
+
+
+def variant_filename(md5_hash, variant, ext):
+    # варианты адресуются содержимым оригинала и лежат рядом с ним
+    return f'{md5_hash}.{variant}.{ext}'
+
+
+def _render_variant(original, max_side, fmt, options, path):
+    img = original.copy()
+    img.thumbnail((max_side, max_side), PILImage.LANCZOS)
+    if fmt == 'JPEG' and img.mode != 'RGB':
+        background = PILImage.new('RGB', img.size, (255, 255, 255))
+        rgba = img.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        img = background
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            img.save(tmp, fmt, **options)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def generate_variants(upload_folder, storage_filename, md5_hash):
+    if PILImage is None:
+        return 0
+    created = 0
+    try:
+        with PILImage.open(os.path.join(upload_folder, storage_filename)) as src:
+            original = ImageOps.exif_transpose(src)
+            original.load()
+            for variant, max_side in VARIANTS.items():
+                for ext, (fmt, _, options) in VARIANT_FORMATS.items():
+                    path = os.path.join(upload_folder, variant_filename(md5_hash, variant, ext))
+                    if not os.path.exists(path):
+                        _render_variant(original, max_side, fmt, options, path)
+                        created += 1
+    except (OSError, ValueError) as err:
+        logger.warning('Не удалось создать варианты для %s: %s', storage_filename, err)
+    return created
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def schedule_variants(img):
+    # ресайз выполняется в фоновом пуле, чтобы не задерживать ответ на загрузку
+    global _executor
+    if PILImage is None:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('IMAGE_VARIANT_WORKERS', 2),
+                thread_name_prefix='image-variants')
+    return _executor.submit(
+        generate_variants,
+        current_app.config['UPLOAD_FOLDER'],
+        img.storage_filename,
+        img.md5_hash)
+
+
+_ready_variants = set()
+
+
+def pick_variant(md5_hash, variant):
+    # возвращает (имя файла, mime) готового варианта или None,
+    # если вариант ещё не создан — тогда отдаётся оригинал
+    if variant not in VARIANTS:
+        return None
+    # WebP только тем, кто явно его заявил: */* есть и у старых браузеров
+    ext = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpg'
+    filename = variant_filename(md5_hash, variant, ext)
+    if filename not in _ready_variants:
+        if not os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], filename)):
+            return None
+        _ready_variants.add(filename)
+    return filename, VARIANT_FORMATS[ext][1]
+
+
+def send_image(image_id):
+    storage_filename, md5_hash, mime_type = lookup(image_id)
+    etag = md5_hash
+
+    variant = request.args.get('size')
+    picked = pick_variant(md5_hash, variant) if variant else None
+    if picked is not None:
+        storage_filename, mime_type = picked
+        etag = storage_filename
+
+    # повторный просмотр: ответ 304 без обращения к БД и диску
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        accel_prefix = current_app.config.get('IMAGE_ACCEL_REDIRECT_PREFIX')
+        if accel_prefix:
+            # отдачу файла берёт на себя nginx (internal location)
+            response = Response(mimetype=mime_type)
+            response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + storage_filename
+        else:
+            # при USE_X_SENDFILE = True Flask сам ставит заголовок X-Sendfile
+            response = send_from_directory(
+                current_app.config['UPLOAD_FOLDER'],
+                storage_filename,
+                mimetype=mime_type,
+                etag=False,
+                conditional=True,
+            )
+
+    response.set_etag(etag)
+    if variant in VARIANTS and picked is None:
+        response.headers['Cache-Control'] = FALLBACK_CACHE_CONTROL
+    else:
+        response.headers['Cache-Control'] = CACHE_CONTROL
+    if variant:
+        response.vary.add('Accept')
+    return response
@@ -0,0 +1,205 @@
+import http.cookiejar
+import json
+import math
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from werkzeug.serving import make_server
+
+
+# --- клиенты: in-process (test_client) и настоящий HTTP через локальный WSGI-сервер ---
+
+class InProcessClient:
+    def __init__(self, app, cookies: bool = True):
+        self.client = app.test_client(use_cookies=cookies)
+
+    def get(self, path: str) -> int:
+        response = self.client.get(path)
+        response.get_data()  # потоковые ответы дочитываем до конца
+        return response.status_code
+
+    def post(self, path: str, data: dict) -> int:
+        response = self.client.post(path, data=data)
+        response.get_data()
+        return response.status_code
+
+
+class HttpClient:
+    def __init__(self, base_url: str, cookies: bool = True):
+        self.base_url = base_url
+        handlers = [_NoRedirect()]
+        if cookies:
+            handlers.append(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self.opener = urllib.request.build_opener(*handlers)
+
+    def get(self, path: str) -> int:
+        return self._open(urllib.request.Request(self.base_url + path))
+
+    def post(self, path: str, data: dict) -> int:
+        body = urllib.parse.urlencode(data).encode()
+        return self._open(urllib.request.Request(self.base_url + path, data=body))
+
+    def _open(self, req) -> int:
+        try:
+            with self.opener.open(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as err:
+            err.read()
+            return err.code
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # редирект после логина — отдельный ответ, а не ещё один запрос в замере
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class LocalServer:
+    def __init__(self, app):
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+
+
+def client_factory(app, mode: str, server: LocalServer | None = None, cookies: bool = True):
+    # cookies=False — каждый запрос от «нового» посетителя (например, замер входа)
+    if mode == 'wsgi':
+        return lambda: HttpClient(server.base_url, cookies)
+    return lambda: InProcessClient(app, cookies)
+
+
+# --- прогон и статистика ---
+
+def percentile(sorted_values: list, q: float) -> float:
+    # nearest-rank: q-й процентиль — значение, не меньше которого q% замеров
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_scenario(make_client, action, clients: int, requests: int, setup=None, warmup: int = 0) -> dict:
+    # action(client) выполняет один запрос и возвращает HTTP-статус;
+    # setup(client) — подготовка клиента до замера (например, вход)
+    per_client = max(1, requests // clients)
+    latencies = [[] for _ in range(clients)]
+    statuses = [{} for _ in range(clients)]
+    ready = threading.Barrier(clients + 1)
+
+    def worker(i):
+        client = make_client()
+        if setup is not None:
+            setup(client)
+        for _ in range(warmup):
+            action(client)
+        ready.wait()
+        own = latencies[i]
+        counts = statuses[i]
+        for _ in range(per_client):
+            started = time.perf_counter()
+            status = action(client)
+            own.append(time.perf_counter() - started)
+            counts[status] = counts.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    ready.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    values = sorted(v for own in latencies for v in own)
+    merged = {}
+    for counts in statuses:
+        for status, n in counts.items():
+            merged[str(status)] = merged.get(str(status), 0) + n
+    return {
+        'requests': len(values),
+        'seconds': round(elapsed, 3),
+        'rps': round(len(values) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p95_ms': round(percentile(values, 95) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'statuses': merged,
+    }
+
+
+def run_routes(app, scenarios: dict, args, setup=None, cookies: bool = True) -> dict:
+    # scenarios: имя -> action(client); маршруты прогоняются по очереди
+    names = args.routes or list(scenarios)
+    unknown = set(names) - set(scenarios)
+    if unknown:
+        raise SystemExit(f"Неизвестные маршруты: {', '.join(sorted(unknown))}")
+    server = LocalServer(app) if args.mode == 'wsgi' else None
+    if server is not None:
+        server.__enter__()
+    try:
+        make_client = client_factory(app, args.mode, server, cookies)
+        return {
+            name: run_scenario(make_client, scenarios[name], args.clients, args.requests, setup, args.warmup)
+            for name in names
+        }
+    finally:
+        if server is not None:
+            server.__exit__()
+
+
+# --- сравнение с сохранённым baseline ---
+
+def compare(routes: dict, baseline: dict, tolerance: float) -> dict:
+    # регрессия: пропускная способность упала или p95 вырос больше чем на tolerance
+    result = {}
+    for name, current in routes.items():
+        base = baseline.get('routes', {}).get(name)
+        if base is None:
+            continue
+        rps_change = (current['rps'] - base['rps']) / base['rps'] if base['rps'] else 0.0
+        p95_change = (current['p95_ms'] - base['p95_ms']) / base['p95_ms'] if base['p95_ms'] else 0.0
+        result[name] = {
+            'rps_change': round(rps_change, 3),
+            'p95_change': round(p95_change, 3),
+            'regression': rps_change < -tolerance or p95_change > tolerance,
+        }
+    return result
+
+
+def report(lab: str, config: dict, routes: dict, baseline_path: str | None,
+           save_baseline: str | None, tolerance: float) -> int:
+    # печатает JSON-отчёт; код возврата 1, если есть регрессии относительно baseline
+    result = {'lab': lab, 'config': config, 'routes': routes}
+    regressions = False
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            result['comparison'] = compare(routes, json.load(f), tolerance)
+        regressions = any(item['regression'] for item in result['comparison'].values())
+    if save_baseline:
+        with open(save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'lab': lab, 'config': config, 'routes': routes}, f, ensure_ascii=False, indent=2)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 1 if regressions else 0
+
+
+def add_arguments(parser) -> None:
+    parser.add_argument('--mode', choices=('inprocess', 'wsgi'), default='inprocess',
+                        help='test_client в том же процессе или HTTP к локальному WSGI-серверу')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=800, help='запросов на маршрут')
+    parser.add_argument('--warmup', type=int, default=5, help='запросов на клиента до замера')
+    parser.add_argument('--routes', nargs='+', help='запустить только эти маршруты')
+    parser.add_argument('--baseline', help='JSON прошлого прогона для сравнения')
+    parser.add_argument('--save-baseline', help='сохранить результаты как baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='допустимое ухудшение, доля')
@@ -0,0 +1,65 @@
+"""Add courses full-text index
+
+Revision ID: 3b9e5d2a7c41
+Revises: 0168470821b5
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e5d2a7c41'
+down_revision = '0168470821b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 есть только в SQLite; на других СУБД поиск остаётся на ILIKE
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("""
+        CREATE VIRTUAL TABLE courses_fts USING fts5(
+            name, short_desc, full_desc,
+            content='courses', content_rowid='id',
+            tokenize='unicode61'
+        )
+    """)
+
+    # индекс внешнего содержимого синхронизируется триггерами
+    op.execute("""
+        CREATE TRIGGER courses_fts_ai AFTER INSERT ON courses BEGIN
+            INSERT INTO courses_fts(rowid, name, short_desc, full_desc)
+            VALUES (new.id, new.name, new.short_desc, new.full_desc);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER courses_fts_ad AFTER DELETE ON courses BEGIN
+            INSERT INTO courses_fts(courses_fts, rowid, name, short_desc, full_desc)
+            VALUES ('delete', old.id, old.name, old.short_desc, old.full_desc);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER courses_fts_au AFTER UPDATE OF name, short_desc, full_desc ON courses BEGIN
+            INSERT INTO courses_fts(courses_fts, rowid, name, short_desc, full_desc)
+            VALUES ('delete', old.id, old.name, old.short_desc, old.full_desc);
+            INSERT INTO courses_fts(rowid, name, short_desc, full_desc)
+            VALUES (new.id, new.name, new.short_desc, new.full_desc);
+        END
+    """)
+
+    # индексируем уже существующие курсы
+    op.execute("INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute('DROP TRIGGER IF EXISTS courses_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS courses_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS courses_fts_ai')
+    op.execute('DROP TABLE IF EXISTS courses_fts')
@@ -2,7 +2,7 @@ import os
 from typing import Optional, Union, List
 from datetime import datetime
 import sqlalchemy as sa
-from werkzeug.security import check_password_hash, generate_password_hash
+from passwords import hasher
 from flask_login import UserMixin
 from flask import url_for
 from flask_sqlalchemy import SQLAlchemy
@@ -45,10 +45,10 @@ class User(Base, UserMixin):
     created_at: Mapped[datetime] = mapped_column(default=datetime.now)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
 
     @property
     def full_name(self):
@@ -72,7 +72,7 @@ class Course(Base):
     created_at: Mapped[datetime] = mapped_column(default=datetime.now)
 
     author: Mapped["User"] = relationship()
-    category: Mapped["Category"] = relationship(lazy=False)
+    category: Mapped["Category"] = relationship()
     bg_image: Mapped["Image"] = relationship()
 
     def __repr__(self):
@@ -0,0 +1,165 @@
+import heapq
+import logging
+import threading
+import time
+from flask import g, has_request_context, jsonify, abort, current_app
+from sqlalchemy import event
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# длинные списки параметров (executemany, IN (...)) в лог и отчёт не тащим целиком
+PARAMS_LIMIT = 500
+
+
+def _short(value, limit=PARAMS_LIMIT):
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+class RequestProfile:
+    __slots__ = ('count', 'duration', 'slowest')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # куча (время, номер, запрос, параметры) — самые медленные запросы запроса
+        self.slowest = []
+
+
+class QueryProfiler:
+    # Профилирование SQL на событиях движка вместо SQLALCHEMY_ECHO:
+    # на каждый запрос — пара perf_counter и несколько сложений, в лог
+    # попадают только запросы дольше порога, параметры сохраняются только
+    # для самых медленных.
+    def __init__(self, slow_threshold=0.1, top=5, max_statements=200):
+        self.slow_threshold = slow_threshold
+        self.top = top
+        self.max_statements = max_statements
+        self.enabled = True
+        self._stats = {}
+        self._slowest = []
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SQL_PROFILING', self.enabled)
+        self.slow_threshold = app.config.get('SQL_SLOW_QUERY_THRESHOLD', self.slow_threshold)
+        self.top = app.config.get('SQL_PROFILING_TOP', self.top)
+        self.max_statements = app.config.get('SQL_PROFILING_MAX_STATEMENTS', self.max_statements)
+        app.extensions['query_profiler'] = self
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/_debug/queries', 'debug_queries', self.summary_view)
+
+    # --- события движка ---
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        # время старта — на контексте выполнения, а не в conn.info: после
+        # упавшего запроса (after_cursor_execute не вызывается) оно уходит
+        # вместе с контекстом и не достаётся следующему запросу соединения
+        if context is not None:
+            context._profiler_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_profiler_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+
+        if has_request_context():
+            profile = g.get('sql_profile')
+            if profile is not None:
+                profile.count += 1
+                profile.duration += elapsed
+                self._push(profile.slowest, elapsed, statement, parameters)
+
+        with self._lock:
+            stat = self._stats.get(statement)
+            if stat is None:
+                if len(self._stats) >= self.max_statements:
+                    stat = self._stats.setdefault('<other>', [0, 0.0, 0.0])
+                else:
+                    stat = self._stats[statement] = [0, 0.0, 0.0]
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] = max(stat[2], elapsed)
+            self._push(self._slowest, elapsed, statement, parameters)
+
+        if elapsed >= self.slow_threshold:
+            logger.warning('Медленный запрос %.1f мс: %s; параметры: %s',
+                           elapsed * 1000, statement, _short(parameters))
+
+    def _push(self, heap, elapsed, statement, parameters):
+        # номер нужен, чтобы при равном времени не сравнивать строки и параметры
+        self._seq += 1
+        if len(heap) < self.top:
+            heapq.heappush(heap, (elapsed, self._seq, statement, _short(parameters)))
+        elif elapsed > heap[0][0]:
+            heapq.heapreplace(heap, (elapsed, self._seq, statement, _short(parameters)))
+
+    # --- обработка HTTP-запроса ---
+
+    def _start_request(self):
+        g.sql_profile = RequestProfile()
+
+    def _finish_request(self, response):
+        profile = g.get('sql_profile')
+        if profile is not None:
+            ms = profile.duration * 1000
+            response.headers['X-DB-Queries'] = str(profile.count)
+            response.headers['X-DB-Time'] = f'{ms:.1f}'
+            response.headers['Server-Timing'] = f'db;dur={ms:.1f};desc="{profile.count} queries"'
+        return response
+
+    # --- сводка ---
+
+    def summary(self, limit=20):
+        with self._lock:
+            stats = sorted(self._stats.items(), key=lambda item: item[1][1], reverse=True)
+            slowest = sorted(self._slowest, reverse=True)
+        return {
+            'threshold_ms': self.slow_threshold * 1000,
+            'statements': [
+                {
+                    'statement': statement,
+                    'count': count,
+                    'total_ms': round(total * 1000, 3),
+                    'avg_ms': round(total / count * 1000, 3),
+                    'max_ms': round(longest * 1000, 3),
+                }
+                for statement, (count, total, longest) in stats[:limit]
+            ],
+            'slowest': [
+                {'ms': round(elapsed * 1000, 3), 'statement': statement, 'parameters': parameters}
+                for elapsed, _, statement, parameters in slowest
+            ],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slowest.clear()
+
+    def summary_view(self):
+        # сводка содержит параметры запросов — в production закрыта, пока
+        # явно не включена
+        if not (current_app.debug or current_app.config.get('SQL_PROFILING_ENDPOINT')):
+            abort(404)
+        return jsonify(self.summary())
+
+
+def request_db_time():
+    profile = g.get('sql_profile')
+    return profile.duration if profile is not None else 0.0
+
+
+profiler = QueryProfiler()
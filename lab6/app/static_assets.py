@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import sys
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # без brotli собираются только .gz
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+# уже сжатые форматы (jpg, png, ...) повторно не сжимаем
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+# --- сборка: python static_assets.py [путь к static] ---
+
+def fingerprint(path):
+    h = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()[:10]
+
+
+def precompress(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    compressed = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed['br'] = brotli.compress(data, quality=11)
+
+    encodings = []
+    for encoding, suffix in ENCODINGS:
+        # крошечные файлы после сжатия бывают больше оригинала
+        if encoding in compressed and len(compressed[encoding]) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed[encoding])
+            encodings.append(encoding)
+    return encodings
+
+
+def build(static_folder):
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    os.makedirs(dist)
+
+    assets = {}
+    encodings = {}
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder) and DIST_DIR in dirs:
+            dirs.remove(DIST_DIR)
+        for name in sorted(files):
+            src = os.path.join(root, name)
+            rel = os.path.relpath(src, static_folder).replace(os.sep, '/')
+            stem, ext = os.path.splitext(rel)
+            hashed = f'{DIST_DIR}/{stem}.{fingerprint(src)}{ext}'
+            dst = os.path.join(static_folder, hashed)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copyfile(src, dst)
+            assets[rel] = hashed
+            if ext.lower() in COMPRESSIBLE:
+                encodings[hashed] = precompress(dst)
+
+    with open(os.path.join(dist, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump({'assets': assets, 'encodings': encodings}, f, indent=2, sort_keys=True)
+    return assets
+
+
+# --- подключение к приложению ---
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST)
+    if not os.path.exists(path):
+        return {'assets': {}, 'encodings': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def init_static(app):
+    # url_for('static', filename='styles.css') -> /static/dist/styles.<hash>.css,
+    # если сборка выполнялась; иначе всё работает как раньше
+    manifest = load_manifest(app.static_folder)
+    assets = manifest['assets']
+    encodings = manifest['encodings']
+    fingerprinted = set(assets.values())
+
+    @app.url_defaults
+    def fingerprint_static_url(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in assets:
+            values['filename'] = assets[values['filename']]
+
+    def static(filename):
+        response = None
+        available = encodings.get(filename, ())
+        if available:
+            accepted = request.accept_encodings
+            for encoding, suffix in ENCODINGS:
+                if encoding in available and accepted[encoding]:
+                    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                    response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype)
+                    response.headers['Content-Encoding'] = encoding
+                    break
+        if response is None:
+            response = send_from_directory(app.static_folder, filename)
+        if available:
+            response.vary.add('Accept-Encoding')
+        if filename in fingerprinted:
+            response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+    app.view_functions['static'] = static
+
+
+if __name__ == '__main__':
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    built = build(folder)
+    print(f'Собрано файлов: {len(built)} -> {os.path.join(folder, DIST_DIR)}')
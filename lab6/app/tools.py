@@ -1,23 +1,66 @@
 import hashlib
+import re
+import tempfile
 import uuid
 import os
+from sqlalchemy import event, func, inspect, literal_column, table, column
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, raiseload
 from werkzeug.utils import secure_filename
 from flask import current_app
 from models import db, Course, Image
+from images import schedule_variants
+
+# FTS5-индекс по name/short_desc/full_desc, см. миграцию add_courses_fts
+courses_fts = table('courses_fts', column('rowid'))
+FTS_WEIGHTS = (10.0, 2.0, 1.0)
+
+_fts_available = {}
+
+
+def fts_available():
+    engine = db.engine
+    if engine.url not in _fts_available:
+        _fts_available[engine.url] = (
+            engine.dialect.name == 'sqlite'
+            and inspect(engine).has_table('courses_fts'))
+    return _fts_available[engine.url]
+
+
+def fts_query(text):
+    # каждое слово ищется по префиксу: "прог"* найдёт «Программирование»
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{w}"*' for w in words)
+
 
 class CoursesFilter:
-    def __init__(self, name, category_ids):
+    def __init__(self, name, category_ids, full_text=None):
         self.name = name
         self.category_ids = category_ids
+        self.full_text = fts_available() if full_text is None else full_text
         self.query = db.select(Course)
+        self.order = [Course.created_at.desc()]
 
     def perform(self):
         self.__filter_by_name()
         self.__filter_by_category_ids()
-        return self.query.order_by(Course.created_at.desc())
+        # каталогу нужен только автор: грузим его в том же SELECT,
+        # а любые другие связи запрещаем, чтобы не было N+1
+        return (self.query
+                .options(joinedload(Course.author), raiseload('*'))
+                .order_by(*self.order))
 
     def __filter_by_name(self):
-        if self.name:
+        if not self.name:
+            return
+        match = fts_query(self.name) if self.full_text else None
+        if match:
+            rank = func.bm25(literal_column('courses_fts'), *FTS_WEIGHTS)
+            self.query = (self.query
+                          .join(courses_fts, courses_fts.c.rowid == Course.id)
+                          .filter(literal_column('courses_fts').op('MATCH')(match)))
+            self.order.insert(0, rank)
+        else:
             self.query = self.query.filter(
                 Course.name.ilike('%' + self.name + '%'))
 
@@ -26,28 +69,102 @@ class CoursesFilter:
             self.query = self.query.filter(
                 Course.category_id.in_(self.category_ids))
 
+class ImageTooLarge(ValueError):
+    def __init__(self, max_size):
+        super().__init__(f'Размер изображения превышает {max_size // (1024 * 1024)} МБ.')
+
+
 class ImageSaver:
+    CHUNK_SIZE = 64 * 1024
+
     def __init__(self, file):
         self.file = file
 
     def save(self):
-        self.img = self.__find_by_md5_hash()
-        if self.img is not None:
+        # Один проход по загрузке: читаем кусками, считаем md5 и пишем
+        # во временный файл рядом с UPLOAD_FOLDER. Если такой файл уже есть,
+        # временный удаляется, иначе атомарно переименовывается.
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        os.makedirs(upload_folder, exist_ok=True)
+        tmp_path = self.__stream_to_temp(upload_folder)
+        try:
+            self.img = self.__find_by_md5_hash()
+            if self.img is not None:
+                return self.img
+            file_name = secure_filename(self.file.filename)
+            self.img = Image(
+                id=str(uuid.uuid4()),
+                file_name=file_name,
+                mime_type=self.file.mimetype,
+                md5_hash=self.md5_hash)
+            storage_path = os.path.join(upload_folder, self.img.storage_filename)
+            os.replace(tmp_path, storage_path)
+            db.session.add(self.img)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # параллельно загрузили тот же файл — используем уже сохранённый
+                db.session.rollback()
+                os.remove(storage_path)
+                self.img = self.__find_by_md5_hash()
+                if self.img is None:
+                    raise
+                return self.img
+            schedule_variants(self.img)
             return self.img
-        file_name = secure_filename(self.file.filename)
-        self.img = Image(
-            id=str(uuid.uuid4()),
-            file_name=file_name,
-            mime_type=self.file.mimetype,
-            md5_hash=self.md5_hash)
-        self.file.save(
-            os.path.join(current_app.config['UPLOAD_FOLDER'],
-                         self.img.storage_filename))
-        db.session.add(self.img)
-        db.session.commit()
-        return self.img
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __stream_to_temp(self, upload_folder):
+        max_size = current_app.config.get('MAX_IMAGE_SIZE')
+        md5 = hashlib.md5()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                while chunk := self.file.stream.read(self.CHUNK_SIZE):
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise ImageTooLarge(max_size)
+                    md5.update(chunk)
+                    tmp.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.md5_hash = md5.hexdigest()
+        return tmp_path
 
     def __find_by_md5_hash(self):
-        self.md5_hash = hashlib.md5(self.file.read()).hexdigest()
-        self.file.seek(0)
         return db.session.execute(db.select(Image).filter(Image.md5_hash == self.md5_hash)).scalar()
+
+
+# Считает SQL-запросы внутри блока with, например:
+#     with QueryCounter() as counter:
+#         client.get('/courses/')
+#     counter.assert_at_most(4)
+# bench_routes.py так проверяет, что каталог не делает N+1 запросов
+class QueryCounter:
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        self.engine = self.engine or db.engine
+        event.listen(self.engine, 'before_cursor_execute', self.__record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self.__record)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def assert_at_most(self, expected):
+        assert self.count <= expected, (
+            f'Ожидалось не более {expected} запросов, выполнено {self.count}:\n'
+            + '\n'.join(self.statements))
+
+    def __record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
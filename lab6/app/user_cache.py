@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# Кэш данных пользователя для user_loader Flask-Login: id -> (срок, данные).
+# Записи живут не дольше ttl и сбрасываются явно при изменении или удалении
+# пользователя. Кэш у каждого процесса свой: при нескольких воркерах
+# изменения в соседних процессах видны не позже чем через ttl секунд.
+class UserCache:
+    def __init__(self, ttl: float = 30.0, maxsize: int = 10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.maxsize = app.config.get('USER_CACHE_SIZE', self.maxsize)
+        app.extensions['user_cache'] = self
+
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id, data) -> None:
+        if self.ttl <= 0:
+            return
+        key = str(user_id)
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, data)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id=None) -> None:
+        with self._lock:
+            if user_id is None:
+                self._items.clear()
+            else:
+                self._items.pop(str(user_id), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'size': len(self._items), 'hits': self.hits, 'misses': self.misses}
+
+
+user_cache = UserCache()